@@ -1,34 +1,38 @@
-import io
 import os
 import sys
 import datetime
 import json
 import textwrap
+import threading
+import time
 
-import pygame
-import pandas as pd
-import yfinance as yf
+from startup import StartupTimer
+startup = StartupTimer() # clock starts before anything heavy is imported
 
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-from matplotlib import font_manager
-from matplotlib.ticker import FuncFormatter
-import matplotlib.pyplot as plt
-import csv
+# only pygame is needed for the first frame; pandas, matplotlib and the price
+# data are imported and loaded on a background thread (see Game.load_data)
+with startup.stage("import pygame + ui"):
+    import pygame
+
+    from button import Button
+    from fonts import FontRegistry
+    from leaderboard import Leaderboard
+    from news import NewsIndex
+    from redraw import DirtyTracker, PopupLayer
+    from replay import EventRecorder, EventReplay
 
 # import ctypes
 # ctypes.windll.shcore.SetProcessDpiAwareness(0) # for Jeff's 4k resolution laptop
 
-from button import Button
-
 abspath = os.path.abspath(__file__)
 dirname = os.path.dirname(abspath)
 os.chdir(dirname) # now the file path is set here no matter what
 
-high_scores = pd.read_csv("scores.csv")
+DATA_READY = pygame.USEREVENT + 1 # posted by the loader thread when data and charts are warm
+CHART_READY = pygame.USEREVENT + 2 # posted by the chart worker when a chart has been rendered
 
 class Game:
-    def __init__(self):
+    def __init__(self, record=None, replay=None):
         # setting attribute
         self.SCREEN_WIDTH, self.SCREEN_HEIGHT = 1280, 720
         self.FPS = 30
@@ -39,24 +43,8 @@ class Game:
         self.START_CASH = 10000
 
         # Dynamic state
-        self.year_idx = 0
-        self.state = "MENU"
-        self.cash = self.START_CASH
-        self.current = 0 # second amount
-        self.entering_name = False
-        self.player_name   = ""
-        self.leaderboard   = None   
-        self.shares = {n: 0.0 for n in self.COMPANIES}
-        self.invested = {n: 0.0 for n in self.COMPANIES}
-        self.totalinvested = self.invested.copy()
-        self.sold = self.invested.copy()
-        self.active_action = None
-        self.input_str = ""
+        self.reset_state()
         self.input_box = pygame.Rect(800, 600, 200, 40)
-        self.popup_surf = None
-        self.popup_rect = None
-        self.news_headline = ""
-        self.news_body = ""
 
         # Tutorial state
         self.tutorial_slides = [
@@ -131,45 +119,40 @@ EPS (Earnings per share) - How much profit
 
 the company makes on each share of stock."""
         ]
-        self.tutorial_idx = 0
 
         self.shift = False # for multi-key entry
 
-
-        # ------------------ Load CSV data ------------------
-        self.csv_dfs = {
-            "Nintendo": pd.read_csv("Nintendo Annual CSV - Sheet1.csv", index_col=0, thousands=","),
-            "TakeTwo":  pd.read_csv("Take Two Annual Data - Sheet1.csv", index_col=0, thousands=","),
-            "EA":       pd.read_csv("EA Annual CSV - Sheet1.csv", index_col=0, thousands=",")
-        }
-        for df in self.csv_dfs.values():
-            df.columns = pd.to_datetime(df.columns, format="%Y-%m-%d")
-
         # ------------------ Load news data ------------------
         with open("news.json", encoding="utf-8") as f:
             self.news_data = json.load(f)
 
-        # ------------------ Initialize Pygame & Data ------------------
-        pygame.init()
-        self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
-        pygame.display.set_caption("PixelInvest")
-        self.clock = pygame.time.Clock()
-        self.pixel_font = lambda sz: pygame.font.Font(self.FONT_PATH, sz)
-        self.bg = pygame.image.load(self.BG_IMAGE).convert()
-
-        # Fetch stock data
-        start_dt = f"{self.START_YEAR}-03-01"
-        HIST_START = "1995-03-01"
-        today = datetime.date.today().isoformat()
-
-        df_yearly = yf.download(list(self.COMPANIES.values()), start=start_dt, end=today)["Close"]
-        df_yearly = df_yearly.resample("Y").last()
-        self.years = df_yearly.index.year.tolist()
-        self.price_vals = {n: df_yearly[t].to_numpy() for n, t in self.COMPANIES.items()}
-
-        df_daily = yf.download(list(self.COMPANIES.values()), start=HIST_START, end=today)["Close"]
-        df_daily.index = pd.to_datetime(df_daily.index)
-        self.df_daily = df_daily
+        # ------------------ Initialize Pygame ------------------
+        with startup.stage("window + assets"):
+            pygame.init()
+            self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
+            pygame.display.set_caption("PixelInvest")
+            self.clock = pygame.time.Clock()
+            self.fonts = FontRegistry(self.FONT_PATH) # each size is loaded once, rendered labels are cached
+            self.pixel_font = self.fonts.get
+            self.bg = pygame.image.load(self.BG_IMAGE).convert()
+            self.dirty = DirtyTracker(self.screen.get_rect()) # only changed regions are redrawn and pushed
+            self.popup_layer = PopupLayer(self.screen.get_size()) # dimmed snapshot shown behind pop-ups
+            self.news = NewsIndex(self.news_data, self.fonts) # (company, year) lookups; pop-ups render on idle frames
+
+        # ------------------ Record / replay ------------------
+        self.recorder = EventRecorder(record) if record else None
+        self.replay = EventReplay(replay) if replay else None
+        # a replay must not add its scores to the real leaderboard
+        self.scores_path = "scores.csv" if self.replay is None else self.replay.scratch("scores.csv")
+
+        # ------------------ Data (background) ------------------
+        # the menu and tutorial don't need any of it, so it loads while the player reads them
+        self.first_frame = True
+        self.startup_report = False
+        self.data_ready = threading.Event()
+        self.load_error = None
+        self.loader = threading.Thread(target=self.load_data, name="loader", daemon=True)
+        self.loader.start()
 
         # ------------------ Buttons ------------------
         self.tab_buttons = {}
@@ -179,7 +162,6 @@ the company makes on each share of stock."""
                 name, self.pixel_font(24),
                 "#ffffff", "#444444"
             )
-        self.active_tab = list(self.tab_buttons.keys())[0]
 
         self.invest_btns = {
             n: Button(None, (850, 500), "BUY", self.pixel_font(30), "White", "Green") for n in self.COMPANIES
@@ -204,7 +186,7 @@ the company makes on each share of stock."""
         )
         self.hint_btn   = Button(
             None, (80, 680), "Hint", self.pixel_font(20), "#ffffff", "#444444"
-        ); self.hint_count = 0
+        )
         self.next_tut_btn = Button(
             None, (self.SCREEN_WIDTH - 180, self.SCREEN_HEIGHT - 80),
             "Next", self.pixel_font(30), "White", "Green"
@@ -216,199 +198,411 @@ the company makes on each share of stock."""
             None, (self.SCREEN_WIDTH //2, 650), "Play again?", self.pixel_font(24), "#ffffff", "#444444")
 
 
-    def restart_game(self):
-        print("Hello world") # keeping this here
-        print(self.cash, self.current)
+    def reset_state(self):
+        # everything a new round starts from on the UI side; money, shares, year and
+        # hints live in the engine. Loaded data, fonts, assets and cached charts are left alone
+        self.state = "MENU"
+        self.current = 0 # second amount
+        self.entering_name = False
+        self.player_name   = ""
+        self.leaderboard   = None
+        self.active_action = None
+        self.input_str = ""
+        self.popup_surf = None
+        self.popup_rect = None
+        self.news_headline = ""
+        self.news_body = ""
+        self.tutorial_idx = 0
+        self.active_tab = list(self.COMPANIES)[0]
+        # last surface drawn per chart slot, shown while its replacement renders; a new round starts with none,
+        # so year 0 never shows the previous game's final-year charts
+        self.shown_charts = {}
 
-        csv_file = open("scores.csv", "a", newline="", encoding="utf-8")
-        csv_writer = csv.writer(csv_file)
-        csv_writer.writerow([self.player_name, self.cash+self.current])
-        csv_file.close()
-        
-        print("Goodbye World!")
+    # the trading state belongs to the engine; the UI only reads it
+    @property
+    def year_idx(self):
+        return self.engine.year_idx
 
-        python = sys.executable # get Python's interpreter's executable path
-        script = os.path.join(dirname, os.path.basename(abspath))  # Absolute path to the script
-    
-        os.execl(python, python, script, *sys.argv[1:]) # restart the script    
+    @property
+    def cash(self):
+        return self.engine.cash
 
-    def create_chart(self, df, years, idx, size):
-        cutoff = datetime.datetime(years[idx], 3, 31)
-        start = cutoff - pd.DateOffset(years=5)
-        df_sub = df[(df.index >= start) & (df.index <= cutoff)]
-        prop = font_manager.FontProperties(fname=self.FONT_PATH)
-        w, h, dpi = size[0], size[1], 100
-        fig = Figure(figsize=(w / dpi, h / dpi), dpi=dpi, facecolor="#121212")
-        FigureCanvas(fig)
-        ax = fig.add_subplot(111)
-        fig.patch.set_facecolor("#121212"); ax.set_facecolor("#121212")
-        for spine in ax.spines.values():
-            spine.set_color("#2f2f2f")
-        ax.grid(color="#2f2f2f", linestyle="--", linewidth=0.5)
-        ax.tick_params(colors="white", labelsize=10)
-        for lbl in ax.get_xticklabels() + ax.get_yticklabels():
-            lbl.set_fontproperties(prop); lbl.set_color("white")
-        ax.set_xlabel("Date", fontproperties=prop, color="white")
-        ax.set_ylabel("Price (USD)", fontproperties=prop, color="white")
-        for ticker in df_sub.columns:
-            ax.plot(df_sub.index, df_sub[ticker], linewidth=1.5, color="#00fc17", label=ticker)
-        ax.legend(loc="upper left", facecolor="#121212", edgecolor="#2f2f2f", labelcolor="white", prop=prop)
-        fig.tight_layout(rect=[0, 0, 0.95, 1])
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=dpi, facecolor=fig.get_facecolor())
-        buf.seek(0)
-        # close the figure to release memory
-        plt.close(fig)
-        return pygame.image.load(buf).convert()
-
-    def create_pchart(self, df, years, idx, size):
-        cutoff = datetime.datetime(years[idx], 3, 31)
-        start = cutoff - pd.DateOffset(years=5)
-        df_sub = df[(df.index >= start) & (df.index <= cutoff)]
-        prop = font_manager.FontProperties(fname=self.FONT_PATH)
-        w, h, dpi = size[0], size[1], 100
-        # fig = Figure(figsize=(w / dpi, h / dpi), dpi=dpi, facecolor="#121212")
-        fig, ax = plt.subplots(figsize=(1.15*w/dpi, h/dpi), dpi=dpi, facecolor="#121212") # new line
-        FigureCanvas(fig)
-        # ax = fig.add_subplot(111)
-        fig.patch.set_facecolor("#121212"); ax.set_facecolor("#121212")
-        for spine in ax.spines.values():
-            spine.set_color("#2f2f2f")
-        ax.grid(color="#2f2f2f", linestyle="--", linewidth=0.5)
-        ax.tick_params(colors="white", labelsize=10)
-        for lbl in ax.get_xticklabels() + ax.get_yticklabels():
-            lbl.set_fontproperties(prop); lbl.set_color("white")
-        ax.set_xlabel("Date", fontproperties=prop, color="white")
-        ax.set_ylabel("Price (USD)", fontproperties=prop, color="white")
-        for ticker in df_sub.columns:
-            ax.plot(df_sub.index, df_sub[ticker], linewidth=1.5, label=ticker)
-        ax.legend(loc="upper left", facecolor="#121212", edgecolor="#2f2f2f", labelcolor="white", prop=prop)
-        fig.tight_layout(rect=[0, 0, 0.95, 1])
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=dpi, facecolor=fig.get_facecolor())
-        buf.seek(0)
-        # close the figure to release memory
-        plt.close(fig)
-        return pygame.image.load(buf).convert()
-
-    def create_portfolio_chart(self, df, shares, years, idx, size):
+    @property
+    def shares(self):
+        return self.engine.shares
+
+    @property
+    def invested(self):
+        return self.engine.invested
+
+    @property
+    def totalinvested(self):
+        return self.engine.totalinvested
+
+    @property
+    def sold(self):
+        return self.engine.sold
+
+    @property
+    def hint_count(self):
+        return self.engine.hint_count
+
+    def restart_game(self):
+        # the score went in when the name was entered; reset in place instead of re-executing the script,
+        # so nothing has to be loaded again
+        self.reset_state()
+        self.popup_layer.close()
+        self.engine.reset()
+        self.valuation.set_holdings(self.holdings())
+        self.invalidate_charts("portfolio") # holdings-dependent; price charts stay warm
+        self.dirty.mark() # the whole screen, chart rects included, so no slot keeps last game's picture
+
+    def load_data(self):
+        try:
+            with startup.stage("import pandas"):
+                import pandas as pd
+            with startup.stage("import matplotlib + charts"):
+                from charts import ChartCache, ChartWorker, LineChart, thousands_fmt
+            # kept for the chart methods, which run every draw and shouldn't import each time
+            self.pd = pd
+            self.LineChart, self.thousands_fmt = LineChart, thousands_fmt
+            with startup.stage("import prices"):
+                from prices import PriceStore, YearEndPrices, yearly_closes
+                from portfolio import PortfolioValuation
+                from engine import TradingEngine
+
+            with startup.stage("load company csv"):
+                from financials import Financials
+                # the sheets are tiny, so parsing them with the csv module every start beats any on-disk cache
+                self.financials = {
+                    "Nintendo": Financials.parse("Nintendo Annual CSV - Sheet1.csv"),
+                    "TakeTwo":  Financials.parse("Take Two Annual Data - Sheet1.csv"),
+                    "EA":       Financials.parse("EA Annual CSV - Sheet1.csv")
+                }
+                self.metric_panels = {} # (company, year) -> rendered metrics block
+
+            # Stock data: loaded from the local store, only the missing days are downloaded
+            with startup.stage("load prices"):
+                start_dt = f"{self.START_YEAR}-03-01"
+                HIST_START = "1995-03-01"
+                today = datetime.date.today().isoformat()
+
+                self.price_store = PriceStore("price_store", self.COMPANIES.values())
+                df_daily = self.price_store.refresh(HIST_START, today)
+                self.df_daily = df_daily
+
+                # the yearly series comes from the daily one instead of a second download
+                self.years, closes = yearly_closes(df_daily, start_dt)
+                self.price_vals = {n: closes[t] for n, t in self.COMPANIES.items()}
+                self.engine = TradingEngine(self.price_vals, self.years, start_cash=self.START_CASH)
+                self.year_end = YearEndPrices(df_daily, self.years) # O(1) price lookups for the frame loop
+                self.valuation = PortfolioValuation(df_daily) # daily portfolio value, updated per trade
+
+            # scores.csv is read once; submissions append to it and update the top 5 in place
+            with startup.stage("load leaderboard"):
+                self.scores = Leaderboard(self.scores_path, k=5)
+
+            # rendered charts only get rebuilt when their inputs change
+            self.chart_cache = ChartCache()
+            self.charts = {} # persistent LineChart per chart slot
+
+            # first-year figures get built and drawn once, so the first GAME frame only has to blit
+            with startup.stage("warm charts"):
+                w, h = (self.SCREEN_WIDTH - 400)//2, 400
+                warm = [self.chart_data(self.df_daily[[t]], self.years, 0, (700,400)) for t in self.COMPANIES.values()]
+                warm.append(self.pchart_data(self.df_daily, self.years, 0, (w,h)))
+                warm.append(self.portfolio_chart_data(self.valuation.values, self.years, 0, (w,h)))
+                for chart, dates, series in warm:
+                    chart.render(dates, series)
+
+            # from here on only the worker thread touches the chart figures
+            self.chart_worker = ChartWorker(CHART_READY)
+        except Exception as exc:
+            self.load_error = exc
+        self.data_ready.set()
+        pygame.event.post(pygame.event.Event(DATA_READY))
+
+    def mouse_pos(self):
+        # during a replay the pointer is wherever the recording had it
+        return self.replay.mouse if self.replay is not None else pygame.mouse.get_pos()
+
+    def screen_label(self):
+        # which screen the next draw is, for replay frame stats
+        if self.state != "GAME":
+            return self.state
+        if not self.data_ready.is_set() or self.load_error is not None:
+            return "LOADING"
+        return "GAME Portfolio" if self.active_tab == "Portfolio" else "GAME company"
+
+    def settle_charts(self):
+        # replay only: let every queued chart finish, so each replayed frame draws the same thing
+        self.chart_worker.join()
+        if self.collect_charts():
+            pygame.event.clear(CHART_READY)
+
+    def collect_charts(self):
+        # caches whatever the worker has finished and returns whether there was anything
+        done = self.chart_worker.collect()
+        for key, surf in done:
+            if surf is not None: # failed jobs come back as None
+                self.chart_cache.put(key, surf)
+        visible = self.visible_chart_keys() if done else set()
+        if any(key in visible for key, surf in done):
+            self.dirty.mark()
+            self.popup_layer.close() # a chart under an open pop-up changed, so retake the snapshot
+        return bool(done)
+
+    def quit(self):
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.replay is not None:
+            print(self.replay.stats.report())
+            self.replay.close()
+        pygame.quit()
+        sys.exit()
+
+    def holdings(self):
+        # shares keyed by ticker instead of company name
+        return {self.COMPANIES[name]: num for name, num in self.shares.items()}
+
+    def portfolio_value(self, idx):
+        # value on the last trading day of year idx
+        return self.valuation.value_at(self.year_end.rows[idx])
+
+    def chart_bounds(self, years, idx):
         cutoff = datetime.datetime(years[idx], 3, 31)
-        start = cutoff - pd.DateOffset(years=5)
-        df_sub = df[(df.index >= start) & (df.index <= cutoff)]
-        port_values = pd.Series(0.0, index=df_sub.index)
-        for comp_name, num in shares.items():
-            ticker = self.COMPANIES[comp_name]
-            if ticker in df_sub.columns:
-                port_values += df_sub[ticker] * num
-        prop = font_manager.FontProperties(fname=self.FONT_PATH)
-        w, h, dpi = size[0], size[1], 100
-        # fig = Figure(figsize=(w / dpi, h / dpi), dpi=dpi, facecolor="#121212")
-        fig, ax = plt.subplots(figsize=(1.15*w/dpi, h/dpi), dpi=dpi, facecolor="#121212") # new line
-        FigureCanvas(fig)
-        # ax = fig.add_subplot(111)
-        fig.patch.set_facecolor("#121212"); ax.set_facecolor("#121212")
-        for spine in ax.spines.values():
-            spine.set_color("#2f2f2f")
-        ax.grid(color="#2f2f2f", linestyle="--", linewidth=0.5)
-        ax.tick_params(colors="white", labelsize=10)
-        for lbl in ax.get_xticklabels() + ax.get_yticklabels():
-            lbl.set_fontproperties(prop); lbl.set_color("white")
-        def y_fmt(x, pos):
-            x = int(x)
-            return f"{x/1000}k" if abs(x) >= 1000 else str(x)
-        ax.yaxis.set_major_formatter(FuncFormatter(y_fmt))
-        ax.set_xlabel("Date", fontproperties=prop, color="white")
-        ax.set_ylabel("Portfolio Value (USD)", fontproperties=prop, color="white")
-        ax.plot(port_values.index, port_values.values, linewidth=1.5, color="#00fc17", label="Portfolio")
-        ax.legend(loc="upper left", facecolor="#121212", edgecolor="#2f2f2f", labelcolor="white", prop=prop)
-        fig.tight_layout(rect=[0, 0, 0.95, 1])
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=dpi, facecolor=fig.get_facecolor())
-        buf.seek(0)
-        # close the figure to release memory
-        plt.close(fig)
-        return pygame.image.load(buf).convert()
+        return cutoff - self.pd.DateOffset(years=5), cutoff
+
+    def chart_window(self, df, years, idx):
+        start, cutoff = self.chart_bounds(years, idx)
+        return df[(df.index >= start) & (df.index <= cutoff)]
+
+    def chart_slot(self, key, make):
+        # one persistent LineChart per slot; styling is only set up the first time
+        if key not in self.charts:
+            self.charts[key] = make()
+        return self.charts[key]
+
+    # each *_data method returns the slot's persistent chart plus the dates and series it should show
+    def chart_data(self, df, years, idx, size):
+        df_sub = self.chart_window(df, years, idx)
+        chart = self.chart_slot(
+            ("price", tuple(df.columns), size),
+            lambda: self.LineChart(size, self.FONT_PATH, list(df.columns), "Price (USD)", colors=["#00fc17"] * len(df.columns))
+        )
+        return chart, df_sub.index, [df_sub[ticker].to_numpy() for ticker in df_sub.columns]
+
+    def pchart_data(self, df, years, idx, size):
+        df_sub = self.chart_window(df, years, idx)
+        chart = self.chart_slot(
+            ("pchart", tuple(df.columns), size),
+            lambda: self.LineChart(size, self.FONT_PATH, list(df.columns), "Price (USD)", width_scale=1.15)
+        )
+        return chart, df_sub.index, [df_sub[ticker].to_numpy() for ticker in df_sub.columns]
+
+    def portfolio_chart_data(self, values, years, idx, size):
+        # values is a PortfolioValuation.values snapshot, one entry per trading day
+        dates, port_values = self.valuation.window(*self.chart_bounds(years, idx), values=values)
+        chart = self.chart_slot(
+            ("portfolio", size),
+            lambda: self.LineChart(size, self.FONT_PATH, ["Portfolio"], "Portfolio Value (USD)", colors=["#00fc17"],
+                                   width_scale=1.15, y_formatter=self.thousands_fmt)
+        )
+        return chart, dates, [port_values]
+
+    def render_chart(self, data):
+        # runs on the chart worker thread
+        chart, dates, series = data
+        chart.render(dates, series)
+        return chart.rgba()
+
+    def chart_requests(self, idx, shares):
+        # slot -> (cache key, worker job) for every chart that can be shown in year idx
+        w, h = (self.SCREEN_WIDTH - 400)//2, 400
+        tickers  = tuple(self.year_end.tickers)
+        holdings = tuple(sorted(shares.items()))
+        values   = self.valuation.values # taken now, so the job matches the holdings in its key
+        requests = {}
+        for comp, ticker in self.COMPANIES.items():
+            requests[comp] = (
+                ("price", (ticker,), idx, (700,400)),
+                lambda t=ticker: self.render_chart(self.chart_data(self.df_daily[[t]], self.years, idx, (700,400)))
+            )
+        requests["portfolio"] = (
+            ("portfolio", tickers, idx, (w,h), holdings),
+            lambda: self.render_chart(self.portfolio_chart_data(values, self.years, idx, (w,h)))
+        )
+        requests["pchart"] = (
+            ("pchart", tickers, idx, (w,h)),
+            lambda: self.render_chart(self.pchart_data(self.df_daily, self.years, idx, (w,h)))
+        )
+        return requests
+
+    def visible_chart_keys(self):
+        # cache keys of the charts the current screen draws; prefetched years aren't among them
+        if self.state != "GAME":
+            return set()
+        slots = [self.active_tab] if self.active_tab in self.COMPANIES else ["portfolio", "pchart"]
+        requests = self.chart_requests(self.year_idx, dict(self.shares))
+        return {requests[slot][0] for slot in slots}
+
+    def invalidate_charts(self, kind=None, year_idx=None):
+        self.chart_cache.invalidate(kind, year_idx)
+        self.chart_worker.forget_failures(kind, year_idx) # charts that failed to render get another try too
+
+    def chart_surface(self, slot):
+        # (surface, failed): the cached chart for the current year, or the slot's previous one while the worker
+        # renders it; failed when rendering this year's chart raised (it is retried after a while)
+        key, job = self.chart_requests(self.year_idx, dict(self.shares))[slot]
+        surf = self.chart_cache.lookup(key)
+        if surf is None:
+            self.chart_worker.submit(key, job)
+            if self.chart_worker.has_failed(key):
+                return None, True
+            return self.shown_charts.get(slot), False
+        self.shown_charts[slot] = surf
+        return surf, False
+
+    def prefetch_charts(self):
+        # while the player sits on a year, render next year's charts ahead of the Next Year click
+        if not self.chart_worker.idle() or self.year_idx + 1 >= len(self.years):
+            return
+        for key, job in self.chart_requests(self.year_idx + 1, dict(self.shares)).values():
+            if key not in self.chart_cache:
+                self.chart_worker.submit(key, job)
+
+    def metric_panel(self, comp, year):
+        # (surface, lines) for the company's metrics that year, rendered the first time it's shown
+        key = (comp, year)
+        if key not in self.metric_panels:
+            fin = self.financials[comp]
+            lines = []
+            if fin.column(year) is not None:
+                lines = [
+                    f"Net Income:  ${fin.get('Net Income/Net Profit (Losses)', year):,.2f}M",
+                    f"Revenue:     ${fin.get('Revenue', year):,.2f}M",
+                    f"Tot. Equity: ${fin.get('Total Equity', year):,.2f}M",
+                    f"PM:          {fin.get('Profit Margin', year):.2f}%",
+                    f"EPS:         {fin.get('Basic Earnings per Share', year):.2f}"
+                ]
+            panel = None
+            if lines:
+                font  = self.pixel_font(20)
+                txts  = [font.render(text, True, "#ffffff") for text in lines]
+                # opaque on the game background, so it blits like a plain copy
+                panel = pygame.Surface((max(t.get_width() for t in txts), (len(txts) - 1)*30 + txts[-1].get_height())).convert()
+                panel.fill((30, 30, 30))
+                for i, txt in enumerate(txts):
+                    panel.blit(txt, (0, i*30))
+            self.metric_panels[key] = (panel, lines)
+        return self.metric_panels[key]
+
+    def draw_chart(self, surf, pos, size, failed=False):
+        if surf is not None:
+            self.screen.blit(surf, pos)
+            return
+        # nothing rendered for this slot yet, or rendering it went wrong
+        pygame.draw.rect(self.screen, "#121212", (pos, size))
+        if failed:
+            txt = self.fonts.render("Chart unavailable", 20, "#d32f2f")
+        else:
+            txt = self.fonts.render("Loading chart...", 20, "#888888")
+        self.screen.blit(txt, txt.get_rect(center=(pos[0] + size[0] // 2, pos[1] + size[1] // 2)))
         
+    def visible_buttons(self):
+        # buttons drawn in the current state, for hover tracking
+        if self.popup_surf is not None:
+            return [] # covered by the pop-up; closing it redraws everything anyway
+        if self.state == "MENU":
+            return [self.play_btn, self.quit_btn]
+        if self.state == "TUTORIAL":
+            return [self.next_tut_btn]
+        if self.state == "ENDGAME":
+            return [] if self.entering_name else [self.play_again_btn]
+        buttons = list(self.tab_buttons.values()) + [self.next_year_btn]
+        if self.active_tab in self.COMPANIES:
+            comp = self.active_tab
+            buttons += [self.news_btn, self.hint_btn, self.invest_btns[comp], self.sell_btns[comp]]
+        else:
+            buttons.append(self.help_btn)
+        return buttons
+
+    def mark_dirty(self, event):
+        # typing only touches its own line; any other click or key may change the whole screen
+        if event.type == pygame.KEYDOWN and self.popup_surf is None:
+            typing = event.key == pygame.K_BACKSPACE or event.unicode.isdigit() or event.unicode == "."
+            if self.state == "GAME" and self.active_action and typing:
+                self.dirty.mark((self.input_box.x, self.input_box.y, self.SCREEN_WIDTH - self.input_box.x, self.input_box.height))
+                return
+            if self.state == "ENDGAME" and self.entering_name and (event.key == pygame.K_BACKSPACE or event.unicode.isalpha()):
+                self.dirty.mark((0, 205, self.SCREEN_WIDTH, 50))
+                return
+        if event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN, pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE, DATA_READY):
+            self.dirty.mark() # CHART_READY only redraws if the chart is on screen, see collect_charts
+
     def show_popup(self, headline, body):
-        all_lines = [headline] + textwrap.wrap(body or "", width=40)
-        headline_font = pygame.font.Font(self.FONT_PATH, 24)
-        headline_font.set_underline(True)
-        body_font = pygame.font.Font(self.FONT_PATH, 24)
-        lh = headline_font.get_linesize()
-        # compute popup size
-        widths = [headline_font.size(all_lines[0])[0]] + [body_font.size(ln)[0] for ln in all_lines[1:]]
-        w_popup = max(widths) + 20
-        h_popup = lh * len(all_lines) + 20
-
-        surf = pygame.Surface((w_popup, h_popup), pygame.SRCALPHA)
-        surf.fill((47,47,47,230))
-        for i, ln in enumerate(all_lines):
-            font = headline_font if i == 0 else body_font
-            txt  = font.render(ln, True, (255,165,0) if i==0 else "#ffffff")
-            x    = (w_popup - txt.get_width())//2 if i==0 else 10
-            surf.blit(txt, (x, 10 + i*lh))
+        surf = self.news.popup(headline, body) # rendered once, then reused
 
         self.popup_surf  = surf
         self.popup_rect = surf.get_rect(center=(self.SCREEN_WIDTH//2, self.SCREEN_HEIGHT//2))
 
+    def draw_loading(self):
+        self.screen.fill((30, 30, 30))
+        if self.load_error is not None:
+            lines = ["Could not load market data:", str(self.load_error)]
+        else:
+            lines = ["Loading market data..."]
+        for i, ln in enumerate(lines):
+            txt = self.fonts.render(ln, 24, "#ffffff")
+            self.screen.blit(txt, txt.get_rect(center=(self.SCREEN_WIDTH // 2, self.SCREEN_HEIGHT // 2 + i * 40)))
+
     def draw_menu(self):
         self.screen.blit(self.bg, (0, 0))
-        title = self.pixel_font(72).render("PixelInvest", True, "#b68f40")
+        title = self.fonts.render("PixelInvest", 72, "#b68f40")
         self.screen.blit(title, title.get_rect(center=(self.SCREEN_WIDTH // 2, 150)))
-        m = pygame.mouse.get_pos()
+        m = self.mouse_pos()
         self.play_btn.changeColor(m); self.play_btn.update(self.screen)
         self.quit_btn.changeColor(m); self.quit_btn.update(self.screen)
 
     def draw_tutorial(self):
         self.screen.fill((20, 20, 20))
         lines = self.tutorial_slides[self.tutorial_idx].split("\n")
-        font = pygame.font.Font(self.FONT_PATH, 28)
+        font = self.pixel_font(28)
         block_h = font.get_linesize() * len(lines)
         y0 = (self.SCREEN_HEIGHT - block_h) // 2
         for i, ln in enumerate(lines):
-            txt = font.render(ln, True, "#ffffff")
+            txt = self.fonts.render(ln, 28, "#ffffff")
             x = (self.SCREEN_WIDTH - txt.get_width()) // 2
             self.screen.blit(txt, (x, y0 + i * font.get_linesize()))
-        m = pygame.mouse.get_pos()
+        m = self.mouse_pos()
         self.next_tut_btn.changeColor(m); self.next_tut_btn.update(self.screen)
     def draw_endgame(self):
-        cutoff = datetime.datetime(self.years[self.year_idx], 12, 31)
-        df_sub = self.df_daily[self.df_daily.index <= cutoff]
-        port_values = pd.Series(0.0, index=df_sub.index)
-        for comp_name, num_shares in self.shares.items():
-            ticker = self.COMPANIES[comp_name]
-            if ticker in df_sub.columns:
-                port_values += df_sub[ticker] * num_shares
-        current_value = port_values.iloc[-1]
-        self.current = current_value
-        m = pygame.mouse.get_pos()
+        self.current = self.portfolio_value(self.year_idx)
+        m = self.mouse_pos()
         self.screen.fill((20,20,20))
 
         score = int(self.cash + self.current)
-        font_big    = pygame.font.Font(self.FONT_PATH, 48)
-        score_surf  = font_big.render(f"${score}", True, "#ffffff")
+        score_surf  = self.fonts.render(f"${score}", 48, "#ffffff")
         score_rect  = score_surf.get_rect(center=(self.SCREEN_WIDTH//2, 100))
         self.screen.blit(score_surf, score_rect)
 
-        prompt_font = pygame.font.Font(self.FONT_PATH, 32)
         if self.entering_name:
-            prompt_surf = prompt_font.render("Enter 5 letter name:", True, "#ffffff")
+            prompt_surf = self.fonts.render("Enter 5 letter name:", 32, "#ffffff")
             p_rect      = prompt_surf.get_rect(center=(self.SCREEN_WIDTH//2, 180))
             self.screen.blit(prompt_surf, p_rect)
 
-            name_surf = prompt_font.render(self.player_name, True, "#ffffff")
+            name_surf = self.fonts.render(self.player_name, 32, "#ffffff")
             n_rect    = name_surf.get_rect(center=(self.SCREEN_WIDTH//2, 230))
             self.screen.blit(name_surf, n_rect)
 
         else:
-            hdr_surf = prompt_font.render("Leaderboard", True, "#ffffff")
+            hdr_surf = self.fonts.render("Leaderboard", 32, "#ffffff")
             hdr_rect = hdr_surf.get_rect(center=(self.SCREEN_WIDTH//2, 180))
             self.screen.blit(hdr_surf, hdr_rect)
 
-            small = pygame.font.Font(self.FONT_PATH, 28)
-            for i, row in enumerate(self.leaderboard.head(5).itertuples(), start=1):
-                text = f"{i}. {row.name} — ${row.score}"
-                txt_surf = small.render(text, True, "#ffffff")
+            for i, (name, score) in enumerate(self.leaderboard, start=1):
+                text = f"{i}. {name} — ${score}"
+                txt_surf = self.fonts.render(text, 28, "#ffffff")
                 y = 180 + i * 40
                 self.screen.blit(txt_surf, (self.SCREEN_WIDTH//2 - txt_surf.get_width()//2, y))
 
@@ -418,7 +612,7 @@ the company makes on each share of stock."""
 
     def draw_game(self):
         self.screen.fill((30, 30, 30))
-        m = pygame.mouse.get_pos()
+        m = self.mouse_pos()
 
         # draw tabs
         for name, btn in self.tab_buttons.items():
@@ -426,33 +620,25 @@ the company makes on each share of stock."""
             btn.changeColor(m); btn.update(self.screen)
 
         # header
-        self.screen.blit(self.pixel_font(25).render(f"Year: {self.years[self.year_idx]}", True, "#b68f40"), (700, 30))
-        self.screen.blit(self.pixel_font(25).render(f"Cash: ${self.cash:,.0f}", True, "#ffffff"),  (250, 30))
+        self.screen.blit(self.fonts.render(f"Year: {self.years[self.year_idx]}", 25, "#b68f40"), (700, 30))
+        self.screen.blit(self.fonts.render(f"Cash: ${self.cash:,.0f}", 25, "#ffffff"),  (250, 30))
 
         if self.active_tab in self.COMPANIES:
             comp   = self.active_tab
             ticker = self.COMPANIES[comp]
 
             # -- Price & YTD change ----------------------------------------
-            cutoff = datetime.datetime(self.years[self.year_idx],12,31)
-            df_sub = self.df_daily[self.df_daily.index <= cutoff]
-            current_price = float(df_sub[ticker].iloc[-1])
-            if self.year_idx > 0:
-                prev_cutoff = datetime.datetime(self.years[self.year_idx-1],12,31)
-                prev_df     = df_sub[df_sub.index <= prev_cutoff]
-                prev_raw    = prev_df[ticker].iloc[-1] if not prev_df.empty else current_price
-            else:
-                prev_raw    = current_price
-            prev_price = float(prev_raw)
+            current_price = self.year_end.price(self.year_idx, ticker)
+            prev_price    = self.year_end.prev_price(self.year_idx, ticker)
             change     = current_price - prev_price
             pct        = (change/prev_price*100) if prev_price != 0 else 0
 
-            price_surf = self.pixel_font(48).render(f"${current_price:,.2f}", True, "#ffffff")
+            price_surf = self.fonts.render(f"${current_price:,.2f}", 48, "#ffffff")
             self.screen.blit(price_surf, (50,120))
             sign = "+" if change >= 0 else ""
-            self.screen.blit(self.pixel_font(24).render(
+            self.screen.blit(self.fonts.render(
                 f"{sign}${change:,.2f} ({sign}{pct:.2f}%) YTD",
-                True, "#00c853" if change >= 0 else "#d32f2f"
+                24, "#00c853" if change >= 0 else "#d32f2f"
             ), (50,120 + price_surf.get_height() + 5))
 
             # -- Total Return -----------------------------------------------
@@ -461,40 +647,26 @@ the company makes on each share of stock."""
             position_value = self.shares[comp] * current_price
             total_ret      = (total_sold + position_value) - cost_basis
             pct_ret        = (total_ret / cost_basis * 100) if cost_basis != 0 else 0
-            tr_font = pygame.font.Font(self.FONT_PATH,16)
-            self.screen.blit(tr_font.render("Total Return:", True, "#ffffff"), (180,self.SCREEN_HEIGHT-100))
+            tr_font = self.pixel_font(16)
+            self.screen.blit(self.fonts.render("Total Return:", 16, "#ffffff"), (180,self.SCREEN_HEIGHT-100))
             sign2 = "+" if total_ret >= 0 else ""
-            self.screen.blit(tr_font.render(
+            self.screen.blit(self.fonts.render(
                 f"{sign2}${total_ret:,.2f} ({sign2}{pct_ret:.2f}%)",
-                True, "#00c853" if total_ret >= 0 else "#d32f2f"
+                16, "#00c853" if total_ret >= 0 else "#d32f2f"
             ), (180 + tr_font.size("Total Return: ")[0] + 20, self.SCREEN_HEIGHT-100))
 
             # -- Price Chart ------------------------------------------------
-            chart = self.create_chart(self.df_daily[[ticker]], self.years, self.year_idx, (700,400))
+            chart, failed = self.chart_surface(comp)
             y_off_chart = 120 + price_surf.get_height() + self.pixel_font(24).get_linesize() + 20
-            self.screen.blit(chart, (50, y_off_chart))
+            self.draw_chart(chart, (50, y_off_chart), (700,400), failed)
 
             # -- CSV Metrics -----------------------------------------------
-            df_cur = self.csv_dfs[comp]
-            cols   = [c for c in df_cur.columns if c.year == self.years[self.year_idx]]
-            lines  = []
-            if cols:
-                col = cols[0]
-                profit_label = r"Net Income/Net Profit\n(Losses)"
-                lines = [
-                    f"Net Income:  ${df_cur.loc[profit_label,col]:,.2f}M",
-                    f"Revenue:     ${df_cur.loc['Revenue',col]:,.2f}M",
-                    f"Tot. Equity: ${df_cur.loc['Total Equity',col]:,.2f}M",
-                    f"PM:          {df_cur.loc['Profit Margin',col]:.2f}%",
-                    f"EPS:         {df_cur.loc['Basic Earnings per Share',col]:.2f}"
-                ]
-                for i, text in enumerate(lines):
-                    surf = self.pixel_font(20).render(text, True, "#ffffff")
-                    self.screen.blit(surf, (780, 220 + i*30))
+            panel, lines = self.metric_panel(comp, self.years[self.year_idx])
+            if panel is not None:
+                self.screen.blit(panel, (780, 220))
 
             # -- News Button with Hover -------------------------------------
-            comp_news = self.news_data.get(comp, [])
-            item = next((it for it in comp_news if it.get("year") == self.years[self.year_idx]), None)
+            item = self.news.get(comp, self.years[self.year_idx])
             if item:
                 self.news_headline = item["headline"]
                 self.news_body     = item["body"]
@@ -520,7 +692,7 @@ the company makes on each share of stock."""
             self.hint_btn.pos = (hint_x, hint_y)
 
             # if no hints left, gray it and change label
-            if self.hint_count >= 5:
+            if self.hint_count >= self.engine.max_hints:
                 self.hint_btn.text = "Out of hints"
                 self.hint_btn.bg_color   = "#888888"
                 self.hint_btn.text_color = "#555555"
@@ -532,8 +704,8 @@ the company makes on each share of stock."""
             self.hint_btn.changeColor(m)
             self.hint_btn.update(self.screen)
 
-            remaining = max(5 - self.hint_count, 0)
-            rem_surf  = self.pixel_font(18).render(f"Hints Left: {remaining}", True, "#ffffff")
+            remaining = max(self.engine.max_hints - self.hint_count, 0)
+            rem_surf  = self.fonts.render(f"Hints Left: {remaining}", 18, "#ffffff")
             # position it to the right of the hint button
             label_x = hint_x + self.hint_btn.rect.width + 10
             # vertically center it on the button
@@ -542,9 +714,9 @@ the company makes on each share of stock."""
 
 
             # -- Shares & Value ---------------------------------------------
-            self.screen.blit(self.pixel_font(20).render(f"Shares: {self.shares[comp]:.2f}", True, "#ffffff"), (400,140))
-            self.screen.blit(self.pixel_font(20).render(
-                f"Total Value: ${self.shares[comp]*current_price:,.2f}", True, "#ffffff"
+            self.screen.blit(self.fonts.render(f"Shares: {self.shares[comp]:.2f}", 20, "#ffffff"), (400,140))
+            self.screen.blit(self.fonts.render(
+                f"Total Value: ${self.shares[comp]*current_price:,.2f}", 20, "#ffffff"
             ), (700,140))
 
             # -- Invest/Sell/Next/Back --------------------------------------
@@ -557,7 +729,7 @@ the company makes on each share of stock."""
             if self.active_action and self.active_action[1] == comp:
                 # 1) draw the input box and the typed shares
                 pygame.draw.rect(self.screen, (255,255,255), self.input_box, 2)
-                txt_surf = self.pixel_font(20).render(self.input_str, True, "#ffffff")
+                txt_surf = self.fonts.render(self.input_str, 20, "#ffffff")
                 self.screen.blit(txt_surf, (self.input_box.x + 5, self.input_box.y + 5))
 
                 # 2) live cost/proceeds preview
@@ -569,7 +741,7 @@ the company makes on each share of stock."""
                 #    use the current_price you already computed earlier
                 cost = amt * current_price
                 cost_text = f"${cost:,.2f}"
-                cost_surf = self.pixel_font(20).render(cost_text, True, "#ffffff")
+                cost_surf = self.fonts.render(cost_text, 20, "#ffffff")
                 #    blit it just to the right of the input box
                 self.screen.blit(
                     cost_surf,
@@ -580,52 +752,38 @@ the company makes on each share of stock."""
 
         else:
             # -- Portfolio View ---------------------------------------------
-            cutoff = datetime.datetime(self.years[self.year_idx],12,31)
-            df_sub = self.df_daily[self.df_daily.index <= cutoff]
-            port_values = pd.Series(0.0, index=df_sub.index)
-            for name, num in self.shares.items():
-                tt = self.COMPANIES[name]
-                if tt in df_sub.columns:
-                    port_values += df_sub[tt] * num
-
-            current = port_values.iloc[-1]
+            current  = self.portfolio_value(self.year_idx)
             self.current = current
-            if self.year_idx > 0:
-                prev_cutoff  = datetime.datetime(self.years[self.year_idx-1], 12, 31)
-                prev_series  = port_values[port_values.index <= prev_cutoff]
-                prev = prev_series.iloc[-1] if not prev_series.empty else port_values.iloc[0]
-            else:
-                prev = current
+            prev     = self.portfolio_value(max(self.year_idx - 1, 0))
 
             change = current - prev
             pct    = (change/prev*100) if prev != 0 else 0
 
-            self.screen.blit(self.pixel_font(72).render(f"${current:,.2f}", True, "#ffffff"), (50,120))
+            self.screen.blit(self.fonts.render(f"${current:,.2f}", 72, "#ffffff"), (50,120))
             sign    = "+" if change >= 0 else ""
-            self.screen.blit(self.pixel_font(24).render(
+            self.screen.blit(self.fonts.render(
                 f"{sign}${change:,.2f} ({sign}{pct:.2f}%) YTD",
-                True, "#00c853" if change >= 0 else "#d32f2f"
+                24, "#00c853" if change >= 0 else "#d32f2f"
             ), (50, 120 + self.pixel_font(72).get_linesize() + 5))
             # -- Two charts side by side ------------------------------------
             w, h = (self.SCREEN_WIDTH - 400)//2, 400
             y0   = 120 + self.pixel_font(72).get_linesize() + self.pixel_font(24).get_linesize() + 20
 
-            port_surf  = self.create_portfolio_chart(self.df_daily, self.shares, self.years, self.year_idx, (w,h))
-            price_surf = self.create_pchart(self.df_daily, self.years, self.year_idx, (w,h))
-            self.screen.blit(port_surf,  (50, y0))
-            self.screen.blit(price_surf, (50 + w + 50, y0))
+            port_surf,  port_failed  = self.chart_surface("portfolio")
+            price_surf, price_failed = self.chart_surface("pchart")
+            self.draw_chart(port_surf,  (50, y0), (w,h), port_failed)
+            self.draw_chart(price_surf, (50 + w + 50, y0), (w,h), price_failed)
 
             # -- Company list ----------------------------------------------
-            pf = self.pixel_font(16)
             for i, name in enumerate(self.COMPANIES):
                 tt = self.COMPANIES[name]
                 ns = self.shares[name]
-                lp = df_sub[tt].iloc[-1] if tt in df_sub.columns else 0
+                lp = self.year_end.price(self.year_idx, tt) if tt in self.year_end.columns else 0
                 y1 = y0 + i*1.5 * 60
-                self.screen.blit(pf.render(name, True, "#ffffff"),        (75 + w*2 + 100, y1))
-                self.screen.blit(pf.render(f"{ns:.2f} shares", True, "#aaaaaa"),
+                self.screen.blit(self.fonts.render(name, 16, "#ffffff"),        (75 + w*2 + 100, y1))
+                self.screen.blit(self.fonts.render(f"{ns:.2f} shares", 16, "#aaaaaa"),
                                 (75 + w*2 + 100, y1+52))
-                self.screen.blit(pf.render(f"${lp:,.2f}", True, "#ffffff"),
+                self.screen.blit(self.fonts.render(f"${lp:,.2f}", 16, "#ffffff"),
                                 (75 + w*2 + 100, y1 + 24))
 
             # Draw help button
@@ -635,27 +793,47 @@ the company makes on each share of stock."""
 
         # -- Pop‑up Overlay ---------------------------------------------
         if self.popup_surf is not None and isinstance(self.popup_rect, pygame.Rect):
-            overlay = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0,0,0,180))
-            self.screen.blit(overlay, (0,0))
-            self.screen.blit(self.popup_surf, self.popup_rect)
+            # later frames reuse this snapshot until the pop-up is dismissed
+            self.popup_layer.open(self.screen, self.popup_surf, self.popup_rect)
+            self.popup_layer.draw(self.screen)
 
     def run(self):
         while True:
             # -- 1) EVENT LOOP ----------------------------------------
-            for event in pygame.event.get():
+            # with nothing to redraw, sleep until the next event instead of spinning at FPS
+            if not self.dirty.pending() and self.state == "GAME" and self.data_ready.is_set() and self.load_error is None:
+                self.prefetch_charts()
+            if not self.dirty.pending() and self.news.pending():
+                self.news.warm() # one news pop-up per idle frame until they're all rendered
+            if self.replay is not None:
+                events = self.replay.next_frame(self)
+            elif self.dirty.pending() or self.news.pending():
+                events = pygame.event.get()
+            else:
+                events = [pygame.event.wait()] + pygame.event.get()
+            if self.recorder is not None:
+                self.recorder.record(events, self.mouse_pos(), self.data_ready.is_set())
+            for event in events:
+                self.mark_dirty(event)
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+                    self.quit()
+
+                if event.type == DATA_READY:
+                    self.startup_report = "--startup-report" in sys.argv # printed after the next frame
+                    continue
+                if event.type == CHART_READY:
+                    self.collect_charts()
+                    continue
 
                 # dismiss pop‑ups
                 if self.popup_surf is not None:
                     if event.type == pygame.MOUSEBUTTONDOWN:
                         self.popup_surf  = None
                         self.popup_rect  = None
+                        self.popup_layer.close()
                     continue
 
-                mpos = pygame.mouse.get_pos()
+                mpos = self.mouse_pos()
 
                 # -- MENU Input ---------------------------------------
                 if self.state == "MENU":
@@ -664,8 +842,7 @@ the company makes on each share of stock."""
                             self.tutorial_idx = 0
                             self.state        = "TUTORIAL"
                         elif self.quit_btn.checkForInput(mpos):
-                            pygame.quit()
-                            sys.exit()
+                            self.quit()
 
                 # -- TUTORIAL Input ---------------------------------
                 elif self.state == "TUTORIAL":
@@ -686,14 +863,9 @@ the company makes on each share of stock."""
                             self.player_name += event.unicode.upper()
                         elif event.key == pygame.K_RETURN and len(self.player_name) == 5:
                             score = int(self.cash + self.current)
-                            with open("scores.csv", "a", newline="", encoding="utf-8") as f:
-                                csv.writer(f).writerow([self.player_name, score])
-
-                            df = pd.read_csv("scores.csv", names=["name","score"])
-                            df["score"] = pd.to_numeric(df["score"], errors="coerce").fillna(0).astype(int)
-                            df.sort_values(by="score", ascending=False, inplace=True)
+                            self.scores.submit(self.player_name, score)
 
-                            self.leaderboard   = df
+                            self.leaderboard   = self.scores.top()
                             self.entering_name = False
 
                         continue
@@ -702,11 +874,12 @@ the company makes on each share of stock."""
                     if (not self.entering_name
                         and event.type == pygame.MOUSEBUTTONDOWN
                         and self.play_again_btn.checkForInput(mpos)):
-                        pygame.quit()
                         self.restart_game()
-                        return
+                        continue
 
                 # -- GAME Input ---------------------------------------
+                elif not self.data_ready.is_set() or self.load_error is not None:
+                    continue # still loading; the loading screen has nothing to click
                 else:
                     # pressing G takes you to the end‐game / name‐entry screen
                     if event.type == pygame.KEYDOWN and event.key == pygame.K_g:
@@ -717,44 +890,20 @@ the company makes on each share of stock."""
                     # News button click
                     if event.type == pygame.MOUSEBUTTONDOWN and self.active_tab in self.COMPANIES:
                         if self.news_btn.checkForInput(mpos):
-                            all_lines = [self.news_headline] + textwrap.wrap(self.news_body or "", width=40)
-                            headline_font = pygame.font.Font(self.FONT_PATH, 24)
-                            headline_font.set_underline(True)
-                            body_font     = pygame.font.Font(self.FONT_PATH, 24)
-                            lh = headline_font.get_linesize()
-                            if len(all_lines) > 1:
-                                widths = [headline_font.size(all_lines[0])[0]] + \
-                                         [body_font.size(ln)[0] for ln in all_lines[1:]]
-                                w_popup = max(widths) + 20
-                            else:
-                                w_popup = headline_font.size(all_lines[0])[0] + 20
-                            h_popup = lh * len(all_lines) + 20
-                            self.popup_surf = pygame.Surface((w_popup, h_popup), pygame.SRCALPHA)
-                            self.popup_surf.fill((47,47,47,230))
-                            for i, ln in enumerate(all_lines):
-                                if i == 0:
-                                    txt = headline_font.render(ln, True, (255,165,0))
-                                    x = (w_popup - txt.get_width()) // 2
-                                else:
-                                    txt = body_font.render(ln, True, "#ffffff")
-                                    x = 10
-                                self.popup_surf.blit(txt, (x, 10 + i * lh))
-                            self.popup_rect = self.popup_surf.get_rect(center=(self.SCREEN_WIDTH//2, self.SCREEN_HEIGHT//2))
+                            self.show_popup(self.news_headline, self.news_body)
                             continue
 
                     # Hint button click
                     if (event.type == pygame.MOUSEBUTTONDOWN
                             and self.active_tab in self.COMPANIES
                             and self.hint_btn.checkForInput(mpos)):
-                        if self.hint_count < 5:
+                        if self.engine.use_hint():
                             next_year = self.years[self.year_idx] + 1
-                            comp_news = self.news_data.get(self.active_tab, [])
-                            item = next((it for it in comp_news if it.get("year") == next_year), None)
+                            item = self.news.get(self.active_tab, next_year)
                             if item:
                                 self.show_popup(item["headline"], item["body"])
                             else:
                                 self.show_popup("No hint available", "")
-                            self.hint_count += 1
                         else:
                             self.show_popup("Out of hints", "")
                         continue
@@ -765,44 +914,25 @@ the company makes on each share of stock."""
                             self.input_str = self.input_str[:-1]
                         elif event.key == pygame.K_RETURN:
                             mode, comp = self.active_action
-                            price      = self.price_vals[comp][self.year_idx]
                             try:
                                 num = int(self.input_str)
                             except:
                                 num = 0
-                            msg = ""
                             if mode == "invest":
-                                cost = num * price
-                                if num <= 0:
-                                    msg = "Enter at least 1 share to buy."
-                                elif cost > self.cash:
-                                    msg = f"Not enough cash: need ${cost:,.2f}."
-                                else:
-                                    self.shares[comp]        += num
-                                    self.invested[comp]      += cost
-                                    self.totalinvested[comp] += cost
-                                    self.cash                -= cost
-                                    msg = f"Bought {num} share(s) for ${cost:,.2f}!"
+                                msg = self.engine.buy(comp, num)
                             else:
-                                to_sell = min(num, int(self.shares[comp]))
-                                if to_sell <= 0:
-                                    msg = "No shares to sell."
-                                else:
-                                    proceeds = to_sell * price
-                                    self.shares[comp]     -= to_sell
-                                    self.sold[comp]       += proceeds
-                                    self.invested[comp]   -= proceeds
-                                    self.cash             += proceeds
-                                    msg = f"Sold {to_sell} share(s) for ${proceeds:,.2f}!"
+                                msg = self.engine.sell(comp, num)
+                            self.valuation.set_position(self.COMPANIES[comp], self.shares[comp])
+                            self.invalidate_charts("portfolio") # holdings changed, old portfolio charts are stale
                             lines = textwrap.wrap(msg, width=60)
-                            font  = pygame.font.Font(self.FONT_PATH,24)
+                            font  = self.pixel_font(24)
                             lh    = font.get_linesize()
                             w_p   = max(font.size(ln)[0] for ln in lines) + 20
                             h_p   = lh * len(lines) + 20
                             self.popup_surf = pygame.Surface((w_p,h_p), pygame.SRCALPHA)
                             self.popup_surf.fill((47,47,47,230))
                             for i, ln in enumerate(lines):
-                                self.popup_surf.blit(font.render(ln,True,"#ffffff"), (10,10+i*lh))
+                                self.popup_surf.blit(self.fonts.render(ln,24,"#ffffff"), (10,10+i*lh))
                             self.popup_rect = pygame.Rect(
                                 (self.SCREEN_WIDTH//2 - w_p//2, self.SCREEN_HEIGHT//2 - h_p//2),
                                 (w_p,h_p)
@@ -824,10 +954,10 @@ the company makes on each share of stock."""
                             elif self.sell_btns[self.active_tab].checkForInput(mpos) and self.shares[self.active_tab] > 0:
                                 self.active_action = ("sell", self.active_tab)
                                 self.input_str     = ""
-                        if self.next_year_btn.checkForInput(mpos) and self.year_idx < len(self.years) - 1:
-                            self.year_idx += 1
+                        if self.next_year_btn.checkForInput(mpos) and self.engine.next_year():
+                            self.invalidate_charts(year_idx=self.year_idx - 1) # last year's charts won't be shown again
                             # end the game once  2025
-                            if self.years[self.year_idx] >= 2025:
+                            if self.engine.over:
                                 self.state         = "ENDGAME"
                                 self.entering_name = True
                                 self.player_name   = ""
@@ -836,19 +966,44 @@ the company makes on each share of stock."""
                             self.tutorial_idx = 0
                             self.state        = "TUTORIAL"
 
-            # -- 2) DRAW & FLIP (outside of the event loop) -----------------
-            if   self.state == "MENU":
-                self.draw_menu()
-            elif self.state == "TUTORIAL":
-                self.draw_tutorial()
-            elif self.state == "ENDGAME":
-                self.draw_endgame()
-            else:
-                self.draw_game()
+            self.dirty.track_hover(self.visible_buttons(), self.mouse_pos())
 
-            pygame.display.flip()
-            self.clock.tick(self.FPS)
+            # -- 2) DRAW & UPDATE dirty regions (outside of the event loop) ---
+            if self.dirty.pending():
+                label = self.screen_label()
+                t0 = time.perf_counter()
+                self.screen.set_clip(self.dirty.clip())
+                if   self.state == "MENU":
+                    self.draw_menu()
+                elif self.state == "TUTORIAL":
+                    self.draw_tutorial()
+                elif self.state == "ENDGAME":
+                    self.draw_endgame()
+                elif not self.data_ready.is_set() or self.load_error is not None:
+                    self.draw_loading()
+                elif self.popup_layer.is_open():
+                    self.popup_layer.draw(self.screen) # nothing under a pop-up changes while it's up
+                else:
+                    self.draw_game()
+                self.screen.set_clip(None)
+                self.dirty.flush()
+                if self.replay is not None:
+                    self.replay.stats.add(label, (time.perf_counter() - t0) * 1000)
+                if self.first_frame:
+                    startup.mark("first frame")
+                    self.first_frame = False
+                if self.startup_report:
+                    print(startup.report())
+                    self.startup_report = False
+            self.clock.tick(self.FPS if self.replay is None else 0) # replays run uncapped
 
 
 if __name__ == "__main__":
-    Game().run()
+    # --startup-report   print the startup timing breakdown once data is loaded
+    # --record FILE      save this session's input to FILE
+    # --replay FILE      play FILE back without a window and print frame times per screen
+    record = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv else None
+    replay = sys.argv[sys.argv.index("--replay") + 1] if "--replay" in sys.argv else None
+    if replay:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    Game(record=record, replay=replay).run()
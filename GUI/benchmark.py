@@ -0,0 +1,266 @@
+"""Micro-benchmarks for PixelInvest.
+
+Run from the GUI folder: python benchmark.py [name ...]
+With no names every benchmark runs. Nothing here needs network access, except
+ui_replay when the local price store hasn't been filled yet.
+Record a new UI session with: python "GAME FINAL VERSION.py" --record recordings/NAME.jsonl
+"""
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window needed to benchmark
+
+import pygame
+
+
+def timed(fn, repeat=20, setup=None):
+    # median milliseconds per call, after one warm-up call; setup (untimed) runs before every call
+    if setup:
+        setup()
+    fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def report(label, ms):
+    print(f"  {label:<40}{ms:10.2f} ms")
+
+
+def sample_prices(days=5 * 252, columns=3, seed=0):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2024-03-31", periods=days)
+    data = 20 + np.cumsum(rng.normal(0, 0.3, (days, columns)), axis=0)
+    return pd.DataFrame(data, index=index, columns=[f"T{i}" for i in range(columns)])
+
+
+def build_chart_figure(df, size=(700, 400)):
+    # same styling steps as Game.create_chart, minus the font file
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+
+    dpi = 100
+    fig = Figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi, facecolor="#121212")
+    FigureCanvas(fig)
+    ax = fig.add_subplot(111)
+    ax.set_facecolor("#121212")
+    for spine in ax.spines.values():
+        spine.set_color("#2f2f2f")
+    ax.grid(color="#2f2f2f", linestyle="--", linewidth=0.5)
+    ax.tick_params(colors="white", labelsize=10)
+    for ticker in df.columns:
+        ax.plot(df.index, df[ticker], linewidth=1.5, label=ticker)
+    ax.legend(loc="upper left", facecolor="#121212", edgecolor="#2f2f2f", labelcolor="white")
+    fig.tight_layout(rect=[0, 0, 0.95, 1])
+    return fig
+
+
+def png_round_trip(fig):
+    # the old path: savefig to PNG in memory, then decode it again
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=fig.dpi, facecolor=fig.get_facecolor())
+    buf.seek(0)
+    return pygame.image.load(buf).convert()
+
+
+def bench_chart_blit():
+    from charts import figure_to_surface
+
+    print("chart_blit: figure -> pygame.Surface per chart")
+    for size in [(700, 400), (440, 400)]:
+        fig = build_chart_figure(sample_prices(), size)
+        before = timed(lambda: png_round_trip(fig))
+        after = timed(lambda: figure_to_surface(fig))
+        report(f"{size[0]}x{size[1]} savefig PNG + image.load", before)
+        report(f"{size[0]}x{size[1]} buffer_rgba + frombuffer", after)
+
+
+def bench_persistent_chart():
+    from charts import LineChart, figure_to_surface
+
+    print("persistent_chart: full figure build vs LineChart.update (700x400)")
+    df = sample_prices(columns=1)
+    chart = LineChart((700, 400), "assets/font.ttf", list(df.columns), "Price (USD)")
+    frames = iter(range(10 ** 6))
+    report("new Figure per chart", timed(lambda: figure_to_surface(build_chart_figure(df))))
+    report("LineChart.update, limits change", timed(lambda: chart.update(df.index, [(df * (1 + next(frames) % 2)).iloc[:, 0]])))
+    chart.update(df.index, [df.iloc[:, 0]])
+    report("LineChart.update, same limits", timed(lambda: chart.update(df.index, [df.iloc[:, 0]])))
+
+
+def write_scores(path, rows, seed=0):
+    # scores.csv as the game leaves it: header, some blank rows, then name,score lines
+    import random
+
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        fh.write("name,score\n")
+        fh.write(",\n" * 20)
+        for i in range(rows):
+            fh.write(f"P{i % 99999:05d},{rng.randint(0, 200000)}\n")
+
+
+def pandas_submit(path, name, score):
+    # the old path: append, re-read the whole file and sort it
+    import csv
+    import pandas as pd
+
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow([name, score])
+    df = pd.read_csv(path, names=["name", "score"], low_memory=False)
+    df["score"] = pd.to_numeric(df["score"], errors="coerce").fillna(0).astype(int)
+    df.sort_values(by="score", ascending=False, inplace=True)
+    return df.head(5)
+
+
+def bench_leaderboard():
+    from leaderboard import Leaderboard
+
+    rows = 10 ** 6
+    print(f"leaderboard: one submission against {rows:,} stored scores")
+    tmp = tempfile.mkdtemp()
+    try:
+        master, path = os.path.join(tmp, "master.csv"), os.path.join(tmp, "scores.csv")
+        write_scores(master, rows)
+        fresh = lambda: shutil.copyfile(master, path) # every run sees the full file, whatever the last one did to it
+        report("append + read_csv + sort (pandas)", timed(lambda: pandas_submit(path, "BENCH", 1234), repeat=3, setup=fresh))
+        report("Leaderboard load (once per session)", timed(lambda: Leaderboard(path), repeat=3, setup=fresh))
+        fresh()
+        board = Leaderboard(path)
+        assert board.rows - board.bad_rows == rows, board.rows # loading never shrinks the file
+        report("Leaderboard.submit + top", timed(lambda: (board.submit("BENCH", 1234), board.top())))
+        report("Leaderboard.compact (opt-in)", timed(lambda: Leaderboard(path, max_rows=rows).submit("BENCH", 1234), repeat=3, setup=fresh))
+    finally:
+        shutil.rmtree(tmp)
+
+
+def pandas_portfolio(df, shares):
+    # the old path: a fresh Series and one += per ticker
+    import pandas as pd
+
+    port_values = pd.Series(0.0, index=df.index)
+    for ticker, num in shares.items():
+        if ticker in df.columns:
+            port_values += df[ticker] * num
+    return port_values
+
+
+def bench_portfolio():
+    from portfolio import PortfolioValuation
+
+    days = 31 * 252 # 1995 to today
+    print(f"portfolio: value series over {days:,} days x 3 tickers")
+    df = sample_prices(days=days)
+    shares = {ticker: 10.0 for ticker in df.columns}
+    valuation = PortfolioValuation(df)
+    valuation.set_holdings(shares)
+    trades = iter(range(10 ** 6))
+    report("pandas Series loop", timed(lambda: pandas_portfolio(df, shares)))
+    report("prices @ holdings", timed(lambda: valuation.set_holdings(shares)))
+    report("set_position (one trade)", timed(lambda: valuation.set_position("T0", next(trades) % 7)))
+    report("value at one day", timed(lambda: valuation.value_at(days - 1)))
+
+
+COMPANY_CSVS = ["Nintendo Annual CSV - Sheet1.csv", "Take Two Annual Data - Sheet1.csv", "EA Annual CSV - Sheet1.csv"]
+
+
+def pandas_financials(path):
+    # the old path: read_csv plus parsing every column header as a date
+    import pandas as pd
+
+    df = pd.read_csv(path, index_col=0, thousands=",")
+    df.columns = pd.to_datetime(df.columns, format="%Y-%m-%d")
+    return df
+
+
+def pandas_metric_lines(df, year):
+    # the old per-frame lookup: scan the columns for the year, then five .loc reads
+    cols = [c for c in df.columns if c.year == year]
+    col = cols[0]
+    profit_label = r"Net Income/Net Profit\n(Losses)"
+    return [
+        f"Net Income:  ${df.loc[profit_label, col]:,.2f}M",
+        f"Revenue:     ${df.loc['Revenue', col]:,.2f}M",
+        f"Tot. Equity: ${df.loc['Total Equity', col]:,.2f}M",
+        f"PM:          {df.loc['Profit Margin', col]:.2f}%",
+        f"EPS:         {df.loc['Basic Earnings per Share', col]:.2f}",
+    ]
+
+
+def bench_financials():
+    from financials import Financials
+
+    print("financials: loading the three company sheets, and one year's metrics")
+    report("pandas read_csv + to_datetime", timed(lambda: [pandas_financials(p) for p in COMPANY_CSVS]))
+    report("Financials.parse (csv module)", timed(lambda: [Financials.parse(p) for p in COMPANY_CSVS]))
+    df = pandas_financials(COMPANY_CSVS[2])
+    fin = Financials.parse(COMPANY_CSVS[2])
+    report("column scan + 5 x .loc", timed(lambda: pandas_metric_lines(df, 2010)))
+    report("5 x Financials.get", timed(lambda: [fin.get(label, 2010) for label in fin.labels[:5]]))
+
+
+def bench_popup_overlay():
+    from redraw import PopupLayer
+
+    print("popup_overlay: one redraw while a pop-up is open (1280x720)")
+    screen = pygame.display.set_mode((1280, 720))
+    popup = pygame.Surface((600, 300), pygame.SRCALPHA)
+    popup.fill((47, 47, 47, 230))
+    rect = popup.get_rect(center=screen.get_rect().center)
+
+    def allocate_overlay():
+        # the old path: a fresh full-screen SRCALPHA overlay every frame
+        overlay = pygame.Surface((1280, 720), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        screen.blit(overlay, (0, 0))
+        screen.blit(popup, rect)
+
+    layer = PopupLayer((1280, 720))
+    layer.open(screen, popup, rect)
+    report("new overlay per frame", timed(allocate_overlay))
+    report("PopupLayer.draw (snapshot + pop-up)", timed(lambda: layer.draw(screen)))
+    report("PopupLayer.open (once per pop-up)", timed(lambda: layer.open(screen, popup, rect)))
+    pygame.display.set_mode((1, 1))
+
+
+def bench_ui_replay():
+    # every recording in recordings/ is replayed through the real game loop
+    print("ui_replay: draw + flush time per screen over recorded sessions")
+    for name in sorted(os.listdir("recordings")):
+        if name.endswith(".jsonl"):
+            print(f"  {name}")
+            subprocess.run([sys.executable, "GAME FINAL VERSION.py", "--replay", os.path.join("recordings", name)], check=True)
+
+
+BENCHMARKS = {
+    "chart_blit": bench_chart_blit,
+    "persistent_chart": bench_persistent_chart,
+    "leaderboard": bench_leaderboard,
+    "portfolio": bench_portfolio,
+    "financials": bench_financials,
+    "popup_overlay": bench_popup_overlay,
+    "ui_replay": bench_ui_replay,
+}
+
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.getcwd())
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    for name in sys.argv[1:] or list(BENCHMARKS):
+        BENCHMARKS[name]()
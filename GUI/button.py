@@ -6,12 +6,19 @@ class Button():
 		self.font = font
 		self.base_color, self.hovering_color = base_color, hovering_color
 		self.text_input = text_input
-		self.text = self.font.render(self.text_input, True, self.base_color)
+		self.rendered = {} # (text, color) -> surface, so hovering doesn't re-render every frame
+		self.text = self.render(self.base_color)
 		if self.image is None:
 			self.image = self.text
 		self.rect = self.image.get_rect(center=(self.x_pos, self.y_pos))
 		self.text_rect = self.text.get_rect(center=(self.x_pos, self.y_pos))
 
+	def render(self, color):
+		key = (self.text_input, color)
+		if key not in self.rendered:
+			self.rendered[key] = self.font.render(self.text_input, True, color)
+		return self.rendered[key]
+
 	def update(self, screen):
 		if self.image is not None:
 			screen.blit(self.image, self.rect)
@@ -24,6 +31,6 @@ class Button():
 
 	def changeColor(self, position):
 		if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(self.rect.top, self.rect.bottom):
-			self.text = self.font.render(self.text_input, True, self.hovering_color)
+			self.text = self.render(self.hovering_color)
 		else:
-			self.text = self.font.render(self.text_input, True, self.base_color)
\ No newline at end of file
+			self.text = self.render(self.base_color)
\ No newline at end of file
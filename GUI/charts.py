@@ -0,0 +1,237 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+import pygame
+from matplotlib import dates as mdates
+from matplotlib import font_manager
+from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+
+def key_matches(key, kind=None, year_idx=None):
+    # chart keys start with (kind, tickers, year_idx, ...); None matches anything
+    return (kind is None or key[0] == kind) and (year_idx is None or key[2] == year_idx)
+
+
+class ChartCache:
+    """LRU cache of rendered chart surfaces.
+
+    Keys are tuples of the inputs that change the picture, always starting with
+    (kind, tickers, year_idx, size, ...) so whole groups can be invalidated.
+    """
+
+    def __init__(self, max_size=12):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        surf = self.surfaces.get(key)
+        if surf is None:
+            self.misses += 1
+            return None
+        self.surfaces.move_to_end(key) # most recently used goes to the back
+        self.hits += 1
+        return surf
+
+    def put(self, key, surf):
+        self.surfaces[key] = surf
+        self.surfaces.move_to_end(key)
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False) # evict the least recently used chart
+
+    def __contains__(self, key):
+        return key in self.surfaces # no hit/miss counting, for prefetch checks
+
+    def invalidate(self, kind=None, year_idx=None):
+        # with no arguments everything goes; otherwise only keys matching the given kind and/or year
+        stale = [key for key in self.surfaces if key_matches(key, kind, year_idx)]
+        for key in stale:
+            del self.surfaces[key]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.surfaces)}
+
+
+def canvas_to_surface(canvas):
+    # wrap whatever is currently in the Agg buffer; convert() copies, so the canvas can be reused
+    size = canvas.get_width_height(physical=True)
+    return pygame.image.frombuffer(canvas.buffer_rgba(), size, "RGBA").convert()
+
+
+def figure_to_surface(fig):
+    """Render a figure with its Agg canvas and wrap the RGBA buffer as a pygame Surface.
+
+    No PNG encode/decode happens; the returned surface is converted to the display
+    format, so it owns its pixels and the figure can be closed or redrawn afterwards.
+    """
+    fig.canvas.draw()
+    return canvas_to_surface(fig.canvas)
+
+
+def thousands_fmt(x, pos):
+    x = int(x)
+    return f"{x/1000}k" if abs(x) >= 1000 else str(x)
+
+
+class LineChart:
+    """A long-lived figure for one chart slot.
+
+    Styling, fonts, lines and legend are set up once. update() only swaps the line
+    data; when the axis limits stay the same the static background is restored and
+    just the lines are redrawn on top of it.
+    """
+
+    def __init__(self, size, font_path, labels, ylabel, colors=None, width_scale=1.0, y_formatter=None):
+        w, h, dpi = size[0], size[1], 100
+        self.prop = font_manager.FontProperties(fname=font_path)
+        self.fig = Figure(figsize=(width_scale * w / dpi, h / dpi), dpi=dpi, facecolor="#121212")
+        self.canvas = FigureCanvas(self.fig)
+        self.ax = ax = self.fig.add_subplot(111)
+        ax.set_facecolor("#121212")
+        for spine in ax.spines.values():
+            spine.set_color("#2f2f2f")
+        ax.grid(color="#2f2f2f", linestyle="--", linewidth=0.5)
+        ax.tick_params(colors="white", labelsize=10)
+        ax.xaxis_date()
+        if y_formatter is not None:
+            ax.yaxis.set_major_formatter(FuncFormatter(y_formatter))
+        ax.set_xlabel("Date", fontproperties=self.prop, color="white")
+        ax.set_ylabel(ylabel, fontproperties=self.prop, color="white")
+
+        colors = colors or [None] * len(labels) # None lets matplotlib pick from its color cycle
+        self.lines = [
+            ax.plot([], [], linewidth=1.5, color=color, label=label)[0]
+            for label, color in zip(labels, colors)
+        ]
+        self.legend = ax.legend(loc="upper left", facecolor="#121212", edgecolor="#2f2f2f", labelcolor="white", prop=self.prop)
+        self.background = None
+        self.limits = None
+        self.label_width = None
+
+    def _redraw_static(self):
+        # ticks may have been recreated for the new limits, so restyle them before drawing
+        for lbl in self.ax.get_xticklabels() + self.ax.get_yticklabels():
+            lbl.set_fontproperties(self.prop); lbl.set_color("white")
+        for artist in self.lines + [self.legend]:
+            artist.set_visible(False)
+        # tight_layout is the slow part of a redraw, so only redo it when the y tick labels change width
+        yaxis = self.ax.yaxis
+        label_width = max((len(t) for t in yaxis.get_major_formatter().format_ticks(yaxis.get_major_locator()())), default=0)
+        if label_width != self.label_width:
+            self.fig.tight_layout(rect=[0, 0, 0.95, 1])
+            self.label_width = label_width
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self.lines + [self.legend]:
+            artist.set_visible(True)
+
+    def render(self, dates, series):
+        # draw into the Agg buffer only; usable off the pygame thread
+        x = mdates.date2num(dates)
+        for line, y in zip(self.lines, series):
+            line.set_data(x, y)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+        limits = (self.ax.get_xlim(), self.ax.get_ylim())
+        if limits != self.limits or self.background is None:
+            self._redraw_static()
+            self.limits = limits
+        else:
+            self.canvas.restore_region(self.background)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+        self.ax.draw_artist(self.legend)
+
+    def update(self, dates, series):
+        self.render(dates, series)
+        return canvas_to_surface(self.canvas)
+
+    def rgba(self):
+        # a copy of the current buffer, safe to hand to another thread
+        return bytes(self.canvas.buffer_rgba()), self.canvas.get_width_height(physical=True)
+
+
+class ChartWorker:
+    """Renders charts on a background thread so the pygame thread never waits on matplotlib.
+
+    submit() queues a job that runs on the worker and returns (rgba_bytes, size).
+    Finished charts are announced by posting notify_event; collect() then turns them
+    into surfaces on the pygame thread. A thread rather than a process pool, because
+    the persistent LineChart figures and the price frames stay shared with the game
+    instead of being pickled across for every request. A job that raises is
+    remembered and only queued again once retry_after seconds have passed (or
+    forget_failures() clears it), so a broken chart doesn't retry every frame but
+    a one-off hiccup doesn't leave the slot empty for the rest of the session.
+    """
+
+    def __init__(self, notify_event, retry_after=5.0):
+        self.notify_event = notify_event
+        self.retry_after = retry_after
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = set() # only touched from the pygame thread
+        self.failed = {} # key -> time.monotonic() when its job raised; same thread
+        self.thread = threading.Thread(target=self._run, name="charts", daemon=True)
+        self.thread.start()
+
+    def submit(self, key, job):
+        if key in self.pending:
+            return
+        if key in self.failed:
+            if time.monotonic() - self.failed[key] < self.retry_after:
+                return
+            del self.failed[key]
+        self.pending.add(key)
+        self.requests.put((key, job))
+
+    def idle(self):
+        return not self.pending
+
+    def has_failed(self, key):
+        return key in self.failed
+
+    def forget_failures(self, kind=None, year_idx=None):
+        # same arguments as ChartCache.invalidate; the charts get another try the next time they're asked for
+        for key in [key for key in self.failed if key_matches(key, kind, year_idx)]:
+            del self.failed[key]
+
+    def join(self):
+        # blocks until every submitted job has run and its event has been posted
+        self.requests.join()
+
+    def _run(self):
+        while True:
+            key, job = self.requests.get()
+            try:
+                self.results.put((key, job(), None))
+            except Exception as exc:
+                self.results.put((key, None, exc))
+            try:
+                pygame.event.post(pygame.event.Event(self.notify_event))
+            except pygame.error: # pygame already quit; nobody is waiting for this chart
+                return
+            finally:
+                self.requests.task_done()
+
+    def collect(self):
+        # [(key, surface), ...] for every finished job; the surface is None when the job raised
+        done = []
+        while True:
+            try:
+                key, result, exc = self.results.get_nowait()
+            except queue.Empty:
+                return done
+            self.pending.discard(key)
+            if exc is not None:
+                print(f"chart {key[0]} failed: {exc}")
+                self.failed[key] = time.monotonic()
+                done.append((key, None))
+                continue
+            rgba, size = result
+            done.append((key, pygame.image.frombuffer(rgba, size, "RGBA").convert()))
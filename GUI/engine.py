@@ -0,0 +1,225 @@
+"""Headless PixelInvest: the trading rules without pygame, plus a batch runner.
+
+Run from the GUI folder to score the sample strategies against the stored prices:
+    python engine.py [games per strategy] [--hints N] [--processes N]
+"""
+import functools
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+
+class TradingEngine:
+    """One game of PixelInvest: cash, positions, the year and the hint budget.
+
+    price_vals maps company -> closing price per game year, as loaded by the game.
+    buy() and sell() return the same messages the game shows in its pop-up, so the
+    UI only has to parse input and draw.
+    """
+
+    def __init__(self, price_vals, years, start_cash=10000, end_year=2025, max_hints=5):
+        # plain floats: scripted games do thousands of scalar lookups, which numpy makes slow
+        self.price_vals = {comp: [float(p) for p in prices] for comp, prices in price_vals.items()}
+        self.years = list(years)
+        self.companies = list(price_vals)
+        self.start_cash = start_cash
+        self.end_year = end_year
+        self.max_hints = max_hints
+        self.reset()
+
+    def reset(self):
+        self.year_idx = 0
+        self.cash = self.start_cash
+        self.shares = {n: 0.0 for n in self.companies}
+        self.invested = {n: 0.0 for n in self.companies}
+        self.totalinvested = self.invested.copy()
+        self.sold = self.invested.copy()
+        self.hint_count = 0
+        self.over = False
+
+    def year(self):
+        return self.years[self.year_idx]
+
+    def price(self, comp):
+        return self.price_vals[comp][self.year_idx]
+
+    def buy(self, comp, num):
+        cost = num * self.price(comp)
+        if num <= 0:
+            return "Enter at least 1 share to buy."
+        if cost > self.cash:
+            return f"Not enough cash: need ${cost:,.2f}."
+        self.shares[comp]        += num
+        self.invested[comp]      += cost
+        self.totalinvested[comp] += cost
+        self.cash                -= cost
+        return f"Bought {num} share(s) for ${cost:,.2f}!"
+
+    def sell(self, comp, num):
+        to_sell = min(num, int(self.shares[comp]))
+        if to_sell <= 0:
+            return "No shares to sell."
+        proceeds = to_sell * self.price(comp)
+        self.shares[comp]     -= to_sell
+        self.sold[comp]       += proceeds
+        self.invested[comp]   -= proceeds
+        self.cash             += proceeds
+        return f"Sold {to_sell} share(s) for ${proceeds:,.2f}!"
+
+    def next_year(self):
+        # False on the last year; the game ends once end_year is reached
+        if self.year_idx >= len(self.years) - 1:
+            return False
+        self.year_idx += 1
+        if self.years[self.year_idx] >= self.end_year:
+            self.over = True
+        return True
+
+    def use_hint(self):
+        # True if the budget allowed it; what the hint says is up to the caller
+        if self.hint_count >= self.max_hints:
+            return False
+        self.hint_count += 1
+        return True
+
+    def value(self):
+        return sum(num * self.price(comp) for comp, num in self.shares.items())
+
+    def score(self):
+        return int(self.cash + self.value())
+
+
+# -- sample strategies -------------------------------------------------------
+# a strategy is called once per year with the engine, before next_year()
+
+def hold_cash(engine):
+    pass
+
+
+def buy_and_hold(engine, comp):
+    if engine.year_idx == 0:
+        engine.buy(comp, int(engine.cash // engine.price(comp)))
+
+
+def equal_weight(engine):
+    # sell everything, then split the cash evenly again
+    for comp in engine.companies:
+        engine.sell(comp, int(engine.shares[comp]))
+    budget = engine.cash / len(engine.companies)
+    for comp in engine.companies:
+        engine.buy(comp, int(budget // engine.price(comp)))
+
+
+def momentum(engine):
+    # all in on whichever company rose the most last year
+    if engine.year_idx == 0:
+        return
+    prev = engine.year_idx - 1
+    best = max(engine.companies, key=lambda c: engine.price(c) / engine.price_vals[c][prev])
+    for comp in engine.companies:
+        if comp != best:
+            engine.sell(comp, int(engine.shares[comp]))
+    engine.buy(best, int(engine.cash // engine.price(best)))
+
+
+def hint_trader(engine):
+    # spends hints as a peek at next year's price; otherwise holds what it has
+    nxt = engine.year_idx + 1
+    if nxt >= len(engine.years):
+        return
+    best = max(engine.companies, key=lambda c: engine.price_vals[c][nxt] / engine.price(c))
+    if engine.price_vals[best][nxt] <= engine.price(best) or not engine.use_hint():
+        return
+    for comp in engine.companies:
+        if comp != best:
+            engine.sell(comp, int(engine.shares[comp]))
+    engine.buy(best, int(engine.cash // engine.price(best)))
+
+
+class RandomTrader:
+    # one random buy or sell a year; seeded per game so a batch is reproducible
+    def __init__(self, seed):
+        self.seed = seed
+
+    def __call__(self, engine):
+        if engine.year_idx == 0:
+            self.rng = random.Random(self.seed)
+        comp = self.rng.choice(engine.companies)
+        if self.rng.random() < 0.5:
+            engine.buy(comp, self.rng.randint(0, int(engine.cash // engine.price(comp))))
+        else:
+            engine.sell(comp, self.rng.randint(0, int(engine.shares[comp])))
+
+
+def play(strategy, price_vals, years, **engine_kwargs):
+    # one full game; returns the final score
+    engine = TradingEngine(price_vals, years, **engine_kwargs)
+    while not engine.over:
+        strategy(engine)
+        if not engine.next_year():
+            break
+    return engine.score()
+
+
+def sample_strategies(games):
+    strategies = [("hold_cash", hold_cash), ("equal_weight", equal_weight), ("momentum", momentum), ("hint_trader", hint_trader)]
+    strategies += [(f"buy_and_hold {comp}", functools.partial(buy_and_hold, comp=comp)) for comp in ("Nintendo", "TakeTwo", "EA")]
+    strategies += [("random", RandomTrader(seed)) for seed in range(games)]
+    return strategies
+
+
+def run_batch(strategies, price_vals, years, processes=None, **engine_kwargs):
+    """Play every (name, strategy) once, spread over a process pool.
+
+    Strategies have to be picklable: module-level functions, functools.partial or
+    instances of module-level classes.
+    Returns [(name, score), ...] in the order given.
+    """
+    names = [name for name, _ in strategies]
+    job = functools.partial(play, price_vals=price_vals, years=years, **engine_kwargs)
+    with multiprocessing.Pool(processes) as pool:
+        scores = pool.map(job, [strategy for _, strategy in strategies], chunksize=64)
+    return list(zip(names, scores))
+
+
+def load_price_vals(path="price_store"):
+    # same yearly closes as Game.load_data, from the local store only
+    from prices import PriceStore, yearly_closes
+
+    companies = {"Nintendo": "NTDOY", "TakeTwo": "TTWO", "EA": "EA"}
+    df_daily = PriceStore(path, companies.values()).load()
+    if df_daily is None:
+        raise RuntimeError(f"no stored prices in {path!r}; start the game once to download them")
+    years, closes = yearly_closes(df_daily, "2002-03-01")
+    return {n: closes[t] for n, t in companies.items()}, years
+
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    args = sys.argv[1:]
+    max_hints, processes = 5, None
+    if "--hints" in args:
+        i = args.index("--hints")
+        max_hints = int(args[i + 1])
+        del args[i:i + 2]
+    if "--processes" in args:
+        i = args.index("--processes")
+        processes = int(args[i + 1])
+        del args[i:i + 2]
+    games = int(args[0]) if args else 10000
+
+    price_vals, years = load_price_vals()
+    strategies = sample_strategies(games)
+    t0 = time.perf_counter()
+    results = run_batch(strategies, price_vals, years, processes, max_hints=max_hints)
+    took = time.perf_counter() - t0
+
+    by_name = {}
+    for name, score in results:
+        by_name.setdefault(name, []).append(score)
+    print(f"{len(results):,} games in {took:.2f} s ({len(results) / took:,.0f} games/s), {max_hints} hints")
+    print(f"{'strategy':<24}{'games':>8}{'mean':>12}{'min':>10}{'max':>10}")
+    for name, scores in by_name.items():
+        print(f"{name:<24}{len(scores):8d}{sum(scores) / len(scores):12,.0f}{min(scores):10,}{max(scores):10,}")
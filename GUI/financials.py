@@ -0,0 +1,52 @@
+import csv
+
+import numpy as np
+
+
+def normalize_label(label):
+    # the sheets have escaped and real line breaks in labels, e.g. "Net Income/Net Profit\n(Losses)"
+    return " ".join(label.replace("\\n", " ").split())
+
+
+def parse_number(text):
+    # "1,088.00" -> 1088.0; blank cells are missing values
+    text = text.replace(",", "").strip()
+    return float(text) if text else np.nan
+
+
+class Financials:
+    """One company's annual statements as a (metric x year) float array.
+
+    Rows are the normalised metric labels, columns the fiscal year-end dates from the
+    sheet header. years maps a calendar year to the first column ending in it, which is
+    what the game shows for that year.
+    """
+
+    def __init__(self, labels, dates, values):
+        self.labels = list(labels)
+        self.rows = {label: i for i, label in enumerate(self.labels)}
+        self.dates = list(dates)
+        self.values = values
+        self.years = {}
+        for col, date in enumerate(self.dates):
+            self.years.setdefault(int(date.split("-")[0]), col)
+
+    @classmethod
+    def parse(cls, path):
+        with open(path, newline="", encoding="utf-8") as fh:
+            reader = csv.reader(fh)
+            dates = [d for d in next(reader)[1:] if d]
+            labels, rows = [], []
+            for row in reader:
+                if not row or not row[0].strip():
+                    continue # blank and note rows at the bottom of some sheets
+                cells = (row[1:] + [""] * len(dates))[:len(dates)]
+                labels.append(normalize_label(row[0]))
+                rows.append([parse_number(c) for c in cells])
+        return cls(labels, dates, np.array(rows, dtype="float64").reshape(len(labels), len(dates)))
+
+    def column(self, year):
+        return self.years.get(year)
+
+    def get(self, label, year):
+        return float(self.values[self.rows[label], self.years[year]])
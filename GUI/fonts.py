@@ -0,0 +1,50 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class FontRegistry:
+    """Loads each font size once and keeps a bounded cache of rendered text.
+
+    Counters: opens is the number of times the font file was loaded, hits/misses
+    are for the rendered-text cache.
+    """
+
+    def __init__(self, path, max_texts=256):
+        self.path = path
+        self.max_texts = max_texts
+        self.fonts = {}
+        self.texts = OrderedDict()
+        self.opens = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(self.path, size)
+            self.fonts[size] = font
+            self.opens += 1
+        return font
+
+    def render(self, text, size, color, antialias=True, underline=False):
+        key = (text, size, color, antialias, underline)
+        surf = self.texts.get(key)
+        if surf is not None:
+            self.texts.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        font = self.get(size)
+        # fonts are shared, so underline is only switched on for this one render
+        font.set_underline(underline)
+        surf = font.render(text, antialias, color)
+        font.set_underline(False)
+        self.texts[key] = surf
+        if len(self.texts) > self.max_texts:
+            self.texts.popitem(last=False)
+        return surf
+
+    def stats(self):
+        return {"opens": self.opens, "sizes": sorted(self.fonts), "hits": self.hits, "misses": self.misses}
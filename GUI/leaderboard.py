@@ -0,0 +1,113 @@
+import csv
+import heapq
+import os
+from collections import deque
+
+
+class Leaderboard:
+    """Top-K scores backed by an append-only scores.csv.
+
+    The file is read once. After that submit() appends a single row (flushed and
+    fsynced) and pushes it onto a K-sized min-heap, so the cost of a submission
+    doesn't depend on how many rows the file has. Blank or malformed rows are
+    skipped. Compaction is opt-in: with max_rows set, once the file passes it the
+    top K and the keep_recent newest rows stay in scores.csv and every other row
+    (malformed ones included) is moved to an archive file next to it, so nothing
+    is ever deleted.
+    """
+
+    HEADER = ["name", "score"]
+
+    def __init__(self, path, k=5, keep_recent=500, max_rows=None):
+        self.path = path
+        self.archive_path = os.path.splitext(path)[0] + ".archive.csv"
+        self.k = k
+        self.max_rows = max_rows # None: never compact
+        self.heap = [] # (score, -seq, name); the weakest kept score sits at heap[0]
+        self.recent = deque(maxlen=keep_recent) # (seq, name, score) of the newest valid rows
+        self.seq = 0
+        self.rows = 0
+        self.bad_rows = 0
+        self.load()
+
+    @staticmethod
+    def parse(row):
+        if len(row) < 2 or not row[0]:
+            return None
+        try:
+            return row[0], int(row[1])
+        except ValueError:
+            pass
+        try:
+            return row[0], int(float(row[1])) # older rows were written as floats
+        except ValueError:
+            return None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, newline="", encoding="utf-8") as fh:
+            for row in csv.reader(fh):
+                if row == self.HEADER:
+                    continue
+                self.rows += 1
+                entry = self.parse(row)
+                if entry is None:
+                    self.bad_rows += 1
+                else:
+                    self._push(*entry)
+
+    def _push(self, name, score):
+        # ties go to whoever got there first, so newer entries carry a smaller -seq
+        self.seq += 1
+        self.recent.append((self.seq, name, score))
+        entry = (score, -self.seq, name)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def submit(self, name, score):
+        score = int(score)
+        with open(self.path, "a", newline="", encoding="utf-8") as fh:
+            csv.writer(fh).writerow([name, score])
+            fh.flush()
+            os.fsync(fh.fileno()) # a score is never lost if the arcade box loses power
+        self.rows += 1
+        self._push(name, score)
+        if self.max_rows is not None and self.rows > self.max_rows:
+            self.compact()
+
+    def top(self):
+        # [(name, score), ...] best first
+        return [(name, score) for score, _, name in sorted(self.heap, reverse=True)]
+
+    def compact(self):
+        # keep the top K and the recent rows in scores.csv, in their original order, and append the rest to the archive.
+        # the file is streamed again rather than rebuilt from memory, so bad rows get archived verbatim too
+        recent_seqs = {seq for seq, _, _ in self.recent}
+        kept_seqs = recent_seqs | {-neg_seq for _, neg_seq, _ in self.heap}
+        tmp = self.path + ".tmp"
+        seq = 0
+        with open(self.path, newline="", encoding="utf-8") as src, \
+                open(tmp, "w", newline="", encoding="utf-8") as dst, \
+                open(self.archive_path, "a", newline="", encoding="utf-8") as archive:
+            kept, moved = csv.writer(dst), csv.writer(archive)
+            kept.writerow(self.HEADER)
+            for row in csv.reader(src):
+                if row == self.HEADER:
+                    continue
+                if self.parse(row) is None:
+                    moved.writerow(row)
+                    continue
+                seq += 1
+                (kept if seq in kept_seqs else moved).writerow(row)
+            for fh in (archive, dst): # the archive is safely on disk before anything leaves scores.csv
+                fh.flush()
+                os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+        # the kept rows are renumbered from 1, so read them back in rather than patching seqs
+        self.heap.clear()
+        self.recent.clear()
+        self.seq = self.rows = self.bad_rows = 0
+        self.load()
@@ -0,0 +1,68 @@
+import textwrap
+
+import pygame
+
+
+class NewsIndex:
+    """news.json keyed by (company, year), with a cache of rendered pop-ups.
+
+    get() replaces scanning a company's list for the year. popup() lays out and
+    renders a headline/body pop-up once; the News and Hint buttons both go through it.
+    warm() renders one not-yet-cached item per call, so the game can fill the cache
+    a little at a time on idle frames.
+    """
+
+    def __init__(self, news_data, fonts, size=24, width=40):
+        self.fonts = fonts
+        self.size = size
+        self.width = width
+        self.items = {}
+        for comp, items in news_data.items():
+            for item in items:
+                # the first entry for a year wins, as the old list scan did
+                self.items.setdefault((comp, item.get("year")), item)
+        self.popups = {}
+        # earliest years first, since that's where a game starts
+        self.to_warm = sorted(self.items, key=lambda k: (k[1], k[0]))
+
+    def get(self, comp, year):
+        return self.items.get((comp, year))
+
+    def popup(self, headline, body):
+        key = (headline, body or "")
+        surf = self.popups.get(key)
+        if surf is None:
+            surf = self.render(*key)
+            self.popups[key] = surf
+        return surf
+
+    def render(self, headline, body):
+        all_lines = [headline] + textwrap.wrap(body, width=self.width)
+        # straight from the font: the finished pop-up is what gets cached, and a few
+        # hundred body lines would only push the game's labels out of the text cache
+        font = self.fonts.get(self.size)
+        lh = font.get_linesize()
+        font.set_underline(True)
+        txts = [font.render(headline, True, (255,165,0))]
+        font.set_underline(False)
+        txts += [font.render(ln, True, "#ffffff") for ln in all_lines[1:]]
+        w_popup = max(txt.get_width() for txt in txts) + 20
+        h_popup = lh * len(all_lines) + 20
+
+        surf = pygame.Surface((w_popup, h_popup), pygame.SRCALPHA)
+        surf.fill((47,47,47,230))
+        for i, txt in enumerate(txts):
+            x = (w_popup - txt.get_width())//2 if i == 0 else 10
+            surf.blit(txt, (x, 10 + i*lh))
+        return surf
+
+    def warm(self):
+        # renders the next item that isn't cached yet
+        while self.to_warm:
+            item = self.items[self.to_warm.pop(0)]
+            if (item["headline"], item["body"] or "") not in self.popups:
+                self.popup(item["headline"], item["body"])
+                return
+
+    def pending(self):
+        return bool(self.to_warm)
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+class PortfolioValuation:
+    """Daily portfolio value from a (days x tickers) price matrix and a holdings vector.
+
+    values is prices @ holdings, computed once. A trade only changes one position,
+    so set_position() adds the change times that ticker's price column instead of
+    redoing the whole product. values is replaced rather than updated in place, so a
+    reference taken for a chart job keeps showing the holdings it was taken with.
+    """
+
+    def __init__(self, df_daily):
+        self.dates = df_daily.index.values
+        self.tickers = list(df_daily.columns)
+        self.columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.prices = df_daily.to_numpy(dtype="float64")
+        self.holdings = np.zeros(len(self.tickers))
+        self.values = self.prices @ self.holdings
+
+    def set_holdings(self, holdings):
+        # holdings maps ticker -> number of shares; anything not listed is zero
+        self.holdings = np.zeros(len(self.tickers))
+        for ticker, num in holdings.items():
+            if ticker in self.columns:
+                self.holdings[self.columns[ticker]] = num
+        self.values = self.prices @ self.holdings
+
+    def set_position(self, ticker, num):
+        col = self.columns[ticker]
+        delta = num - self.holdings[col]
+        if delta == 0:
+            return
+        self.holdings[col] = num
+        self.values = self.values + delta * self.prices[:, col]
+
+    def value_at(self, row):
+        return float(self.values[row])
+
+    def window(self, start, end, values=None):
+        # (dates, values) for start <= date <= end, same rows as the boolean mask on the DataFrame
+        values = self.values if values is None else values
+        lo = np.searchsorted(self.dates, np.datetime64(start, "ns"), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(end, "ns"), side="right")
+        return self.dates[lo:hi], values[lo:hi]
@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class YFinanceSource:
+    # the default source; anything with the same fetch() signature can stand in for it
+    def fetch(self, tickers, start, end):
+        import yfinance as yf
+        return yf.download(list(tickers), start=start, end=end)["Close"]
+
+
+class PriceStore:
+    """Daily closes kept on disk so the game can start without downloading anything.
+
+    The store is a folder with one .npy column per ticker plus a shared dates.npy,
+    loaded memory-mapped. refresh() only asks the source for dates from the last
+    stored day on and keeps whatever is on disk if the source fails or returns nothing.
+    The source's closes are split/dividend adjusted, so if the overlapping day no
+    longer matches what is stored, the whole history is fetched again.
+    """
+
+    def __init__(self, path, tickers, source=None):
+        self.path = path
+        self.tickers = list(tickers)
+        self.source = source or YFinanceSource()
+
+    def column_path(self, name):
+        return os.path.join(self.path, f"{name}.npy")
+
+    def load(self):
+        if not all(os.path.exists(self.column_path(n)) for n in ["dates"] + self.tickers):
+            return None
+        dates = np.load(self.column_path("dates"), mmap_mode="r")
+        columns = [np.load(self.column_path(t), mmap_mode="r") for t in self.tickers]
+        # column_stack copies out of the maps, so the files can be replaced by save() later
+        return pd.DataFrame(np.column_stack(columns), index=pd.DatetimeIndex(np.array(dates)), columns=self.tickers)
+
+    def save(self, df):
+        os.makedirs(self.path, exist_ok=True)
+        arrays = {"dates": df.index.values.astype("datetime64[ns]")}
+        arrays.update({t: df[t].to_numpy(dtype="float64") for t in self.tickers})
+        for name, values in arrays.items():
+            tmp = self.column_path(name) + ".tmp"
+            with open(tmp, "wb") as fh:
+                np.save(fh, values)
+            os.replace(tmp, self.column_path(name)) # never leave a half-written column behind
+
+    def fetch(self, start, end):
+        try:
+            df = self.source.fetch(self.tickers, start, end)
+        except Exception as exc: # offline or the source is down; the store is still usable
+            print(f"price refresh failed: {exc}")
+            return None
+        if df is None or df.empty:
+            return None
+        df.index = pd.to_datetime(df.index)
+        return df.reindex(columns=self.tickers)
+
+    def refresh(self, start, end):
+        df = self.load()
+        if df is None:
+            df = self.fetch(start, end)
+            if df is None:
+                raise RuntimeError(f"no stored prices in {self.path!r} and the price source is unavailable")
+            self.save(df)
+            return df
+
+        last_day = df.index[-1]
+        if (last_day + pd.Timedelta(days=1)).date().isoformat() < end:
+            tail = self.fetch(last_day.date().isoformat(), end) # starts on the last stored day, to compare against it
+            if tail is not None:
+                if self.readjusted(df, tail):
+                    full = self.fetch(start, end)
+                    if full is not None:
+                        self.save(full)
+                        return full
+                    return df # keep the stored history rather than mix two adjustments
+                df = pd.concat([df, tail])
+                df = df[~df.index.duplicated(keep="last")].sort_index()
+                self.save(df)
+        return df
+
+    def readjusted(self, df, tail):
+        # a split or dividend since the last refresh rescales every earlier close the source returns
+        if df.index[-1] not in tail.index:
+            return False
+        stored, fresh = df.loc[df.index[-1]].to_numpy(), tail.loc[df.index[-1]].to_numpy()
+        known = ~np.isnan(stored) & ~np.isnan(fresh)
+        return not np.allclose(stored[known], fresh[known], rtol=1e-6)
+
+
+def yearly_closes(df_daily, start):
+    # (years, {ticker: closes}) with the last close of every calendar year from start on
+    # groupby on the year rather than resample, whose year-end alias was renamed between pandas versions
+    df_daily = df_daily[df_daily.index >= start]
+    df_yearly = df_daily.groupby(df_daily.index.year).last()
+    return df_yearly.index.tolist(), {t: df_yearly[t].to_numpy() for t in df_yearly.columns}
+
+
+class YearEndPrices:
+    """Closing price on the last trading day of each game year, per ticker.
+
+    Built once from the daily close table with searchsorted, so the frame loop
+    reads prices with plain array indexing.
+    """
+
+    def __init__(self, df_daily, years):
+        self.tickers = list(df_daily.columns)
+        self.columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+        dates = df_daily.index.values
+        cutoffs = np.array([f"{year}-12-31" for year in years], dtype="datetime64[ns]")
+        # last row on or before Dec 31, same as df[df.index <= cutoff].iloc[-1]
+        self.rows = np.searchsorted(dates, cutoffs, side="right") - 1
+        self.table = df_daily.to_numpy(dtype="float64")[self.rows] # (years x tickers)
+
+    def price(self, year_idx, ticker):
+        return float(self.table[year_idx, self.columns[ticker]])
+
+    def prev_price(self, year_idx, ticker):
+        # the first year has nothing before it, so it counts as no change
+        return self.price(max(year_idx - 1, 0), ticker)
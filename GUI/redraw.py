@@ -0,0 +1,78 @@
+import pygame
+
+
+class DirtyTracker:
+    """Collects the screen regions that changed since the last update.
+
+    A full redraw is requested with mark(); smaller changes pass a rect. Button
+    hover is tracked here too, so moving the mouse only dirties the buttons whose
+    hover state actually flipped.
+    """
+
+    def __init__(self, screen_rect):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.rects = []
+        self.full = True # the first frame always draws everything
+        self.hovered = {}
+
+    def mark(self, rect=None):
+        if rect is None:
+            self.full = True
+        else:
+            self.rects.append(pygame.Rect(rect))
+
+    def pending(self):
+        return self.full or bool(self.rects)
+
+    def track_hover(self, buttons, pos):
+        for btn in buttons:
+            hovering = btn.checkForInput(pos)
+            if self.hovered.get(btn) != hovering:
+                self.hovered[btn] = hovering
+                self.mark(btn.rect.union(btn.text_rect))
+
+    def clip(self):
+        # one bounding rect for drawing; update() still gets the individual rects
+        if self.full:
+            return self.screen_rect
+        return self.rects[0].unionall(self.rects[1:]).clip(self.screen_rect)
+
+    def flush(self):
+        rects = [self.screen_rect] if self.full else self.rects
+        pygame.display.update(rects)
+        self.rects = []
+        self.full = False
+
+
+class PopupLayer:
+    """Draws a modal pop-up over a frozen, dimmed copy of the screen.
+
+    The dim overlay and the snapshot surface are allocated once. open() copies the
+    screen into the snapshot and dims it; until close(), a redraw is just the snapshot
+    and the pop-up, with no surfaces created and nothing underneath redrawn.
+    """
+
+    def __init__(self, size, dim=(0, 0, 0, 180)):
+        self.overlay = pygame.Surface(size, pygame.SRCALPHA)
+        self.overlay.fill(dim)
+        self.snapshot = pygame.Surface(size).convert()
+        self.surf = None
+        self.rect = None
+
+    def is_open(self):
+        return self.surf is not None
+
+    def open(self, screen, surf, rect):
+        self.snapshot.blit(screen, (0, 0))
+        self.snapshot.blit(self.overlay, (0, 0))
+        self.surf = surf
+        self.rect = rect
+
+    def close(self):
+        # also used to retake the snapshot when something underneath changed
+        self.surf = None
+        self.rect = None
+
+    def draw(self, screen):
+        screen.blit(self.snapshot, (0, 0))
+        screen.blit(self.surf, self.rect)
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pygame
+
+
+def encode_event(event):
+    # only the plain attributes; anything else (window handles etc.) isn't needed to replay input
+    attrs = {k: v for k, v in event.dict.items() if isinstance(v, (bool, int, float, str, tuple))}
+    return {"type": event.type, "attrs": attrs}
+
+
+def decode_event(data):
+    attrs = {k: tuple(v) if isinstance(v, list) else v for k, v in data["attrs"].items()}
+    return pygame.event.Event(data["type"], attrs)
+
+
+class EventRecorder:
+    """Saves the input of a session, one JSON line per frame.
+
+    Each line has the frame's events, the mouse position and whether the background
+    data had finished loading, plus the time since the previous frame. The game's own
+    USEREVENTs are left out; a replay produces those by itself.
+    """
+
+    def __init__(self, path):
+        self.fh = open(path, "w", encoding="utf-8")
+        self.last = time.perf_counter()
+
+    def record(self, events, mouse, ready):
+        now = time.perf_counter()
+        frame = {
+            "ms": round((now - self.last) * 1000, 3),
+            "mouse": list(mouse),
+            "ready": ready,
+            "events": [encode_event(e) for e in events if e.type < pygame.USEREVENT],
+        }
+        self.fh.write(json.dumps(frame) + "\n")
+        self.last = now
+
+    def close(self):
+        self.fh.close()
+
+
+class EventReplay:
+    """Feeds a recorded session back into the game, frame by frame, as fast as possible.
+
+    Before each frame it waits for whatever the recording had at that point (loaded
+    data, rendered charts), so every replay draws the same frames and the frame times
+    in stats can be compared between runs. When the recording runs out it sends QUIT.
+    """
+
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as fh:
+            self.frames = [json.loads(line) for line in fh if line.strip()]
+        self.pos = 0
+        self.mouse = (0, 0)
+        self.stats = FrameStats()
+        self.tmp = None
+
+    def scratch(self, path):
+        # a throwaway copy, so the replay doesn't write into the real file
+        if self.tmp is None:
+            self.tmp = tempfile.mkdtemp()
+        copy = os.path.join(self.tmp, os.path.basename(path))
+        if os.path.exists(path):
+            shutil.copy(path, copy)
+        return copy
+
+    def next_frame(self, game):
+        if self.pos >= len(self.frames):
+            return [pygame.event.Event(pygame.QUIT)]
+        frame = self.frames[self.pos]
+        self.pos += 1
+        if frame["ready"]:
+            game.data_ready.wait()
+        if game.data_ready.is_set() and game.load_error is None:
+            game.settle_charts()
+        self.mouse = tuple(frame["mouse"])
+        return pygame.event.get() + [decode_event(e) for e in frame["events"]]
+
+    def close(self):
+        if self.tmp is not None:
+            shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+class FrameStats:
+    # draw + flush time per screen, reported as percentiles
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, label, ms):
+        self.samples.setdefault(label, []).append(ms)
+
+    @staticmethod
+    def percentile(samples, q):
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def report(self):
+        lines = [f"{'screen':<18}{'frames':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for label, samples in sorted(self.samples.items()):
+            s = sorted(samples)
+            lines.append(f"{label:<18}{len(s):8d}" + "".join(f"{self.percentile(s, q):10.2f}" for q in (0.5, 0.95, 0.99)) + f"{s[-1]:10.2f}")
+        return "\n".join(lines)
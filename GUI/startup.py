@@ -0,0 +1,38 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Wall-clock breakdown of startup, in the spirit of python -X importtime.
+
+    Each stage records how long it took, which thread ran it and how many new
+    modules it imported. mark() records a single point in time, like the first frame.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        modules = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.stages.append((name, threading.current_thread().name, start - self.t0, end - start, len(sys.modules) - modules))
+
+    def mark(self, name):
+        with self.lock:
+            self.stages.append((name, threading.current_thread().name, time.perf_counter() - self.t0, 0.0, 0))
+
+    def report(self):
+        lines = [f"{'stage':<28}{'thread':<14}{'start ms':>10}{'took ms':>10}{'modules':>9}"]
+        for name, thread, start, took, modules in sorted(self.stages, key=lambda s: s[2]):
+            lines.append(f"{name:<28}{thread:<14}{start * 1000:10.1f}{took * 1000:10.1f}{modules:9d}")
+        return "\n".join(lines)
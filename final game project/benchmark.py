@@ -0,0 +1,506 @@
+"""Micro-benchmarks for the tile game.
+
+Run from the repository root (the asset paths in scripts/utils.py are relative to it):
+python "final game project/benchmark.py" [name ...]
+With no names every benchmark runs.
+"""
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window needed to benchmark
+
+import pygame
+
+
+def timed(fn, repeat=20):
+    # median milliseconds per call, after one warm-up call
+    fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def report(label, ms):
+    print(f"  {label:<48}{ms:10.2f} ms")
+
+
+def editor_assets():
+    # the same groups the editor places
+    from scripts.utils import load_images
+
+    return {
+        "floor": load_images("Floor 64px"),
+        "wall": load_images("Wall 64px"),
+        "bed": load_images("Bed"),
+    }
+
+
+class StringTilemap:
+    # the old "x;y" string-keyed storage, kept here as the baseline
+    def __init__(self, game, tile_size=16):
+        from scripts.tilemap import NEIGHBOR_OFFSETS, PHYSICS_TILES
+
+        self.game = game
+        self.tile_size = tile_size
+        self.tilemap = {}
+        self.offgrid_tiles = []
+        self.neighbor_offsets = NEIGHBOR_OFFSETS
+        self.physics_tiles = PHYSICS_TILES
+
+    def tiles_around(self, pos):
+        tiles = []
+        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        for offset in self.neighbor_offsets:
+            check_loc = str(tile_loc[0] + offset[0]) + ";" + str(tile_loc[1] + offset[1])
+            if check_loc in self.tilemap:
+                tiles.append(self.tilemap[check_loc])
+        return tiles
+
+    def physics_rects_around(self, pos):
+        rects = []
+        for tile in self.tiles_around(pos):
+            if tile["type"] in self.physics_tiles:
+                rects.append(pygame.Rect(tile["pos"][0] * self.tile_size, tile["pos"][1] * self.tile_size, self.tile_size, self.tile_size))
+        return rects
+
+    def render(self, surf, offset=(0, 0)):
+        for tile in self.offgrid_tiles:
+            surf.blit(self.game.assets[tile["type"]][tile["variant"]], (tile["pos"][0] - offset[0], tile["pos"][1] - offset[1]))
+        for x in range(offset[0] // self.tile_size, (offset[0] + surf.get_width()) // self.tile_size + 1):
+            for y in range(offset[1] // self.tile_size, (offset[1] + surf.get_height()) // self.tile_size + 1):
+                loc = str(x) + ";" + str(y)
+                if loc in self.tilemap:
+                    tile = self.tilemap[loc]
+                    surf.blit(self.game.assets[tile["type"]][tile["variant"]], (tile["pos"][0] * self.tile_size - offset[0], tile["pos"][1] * self.tile_size - offset[1]))
+
+
+def random_map(game, width, height, fill=0.6, seed=0):
+    # width x height cells, about `fill` of them set, returned in both storages
+    from scripts.tilemap import Tilemap
+
+    rng = random.Random(seed)
+    groups = [(name, len(game.assets[name])) for name in game.assets]
+    old, new = StringTilemap(game), Tilemap(game)
+    for x in range(width):
+        for y in range(height):
+            if rng.random() < fill:
+                name, variants = rng.choice(groups)
+                variant = rng.randrange(variants)
+                old.tilemap[str(x) + ";" + str(y)] = {"type": name, "variant": variant, "pos": [x, y]}
+                new.set_tile((x, y), name, variant)
+    return old, new
+
+
+def bench_tilemap():
+    game = SimpleNamespace(assets=editor_assets())
+    display = pygame.Surface((640, 480))
+    print("tilemap: string-keyed dict vs 16x16 chunks")
+    for width, height in [(500, 330), (1300, 1300)]:
+        old, new = random_map(game, width, height)
+        print(f"  {new.tile_count()} tiles, {len(new.chunks)} chunks")
+        rng = random.Random(1)
+        points = [(rng.uniform(0, width * 16), rng.uniform(0, height * 16)) for _ in range(10000)]
+        assert all([(t["pos"][0], t["pos"][1], new.type_ids[t["type"]], t["variant"]) for t in old.tiles_around(p)] == new.tiles_around(p) for p in points[:2000])
+        assert all(old.physics_rects_around(p) == new.physics_rects_around(p) for p in points[:500])
+        for name in ("tiles_around", "physics_rects_around"):
+            for label, tilemap in (("old", old), ("chunks", new)):
+                fn = getattr(tilemap, name)
+                report(f"{name} x10000 ({label})", timed(lambda: [fn(p) for p in points], repeat=5))
+        offset = (width * 8, height * 8)
+        for label, tilemap in (("old", old), ("chunks", new)):
+            report(f"render 640x480 ({label})", timed(lambda: tilemap.render(display, offset)))
+
+
+def bench_chunk_render():
+    game = SimpleNamespace(assets=editor_assets())
+    display = pygame.Surface((640, 480))
+    print("chunk_render: per-tile blits vs baked chunk surfaces")
+    width, height = 1300, 1300
+    old, new = random_map(game, width, height)
+    rng = random.Random(2)
+    for _ in range(20000): # scattered decor, almost all of it off screen
+        name = rng.choice(list(game.assets))
+        tile = {"type": name, "variant": rng.randrange(len(game.assets[name])), "pos": (rng.uniform(0, width * 16), rng.uniform(0, height * 16))}
+        old.offgrid_tiles.append(tile)
+        new.add_offgrid(tile["type"], tile["variant"], tile["pos"])
+    print(f"  {new.tile_count()} tiles, {len(new.offgrid_tiles)} off-grid")
+    offset = (width * 8, height * 8)
+
+    def cold():
+        new.baked.clear()
+        new.render(display, offset)
+
+    edits = iter(range(10 ** 9))
+
+    def edited():
+        new.set_tile((width // 2, height // 2), ("floor", "wall")[next(edits) % 2], 0) # a different tile every time
+        new.render(display, offset)
+
+    def held():
+        new.set_tile((width // 2, height // 2), "floor", 0) # the editor with the mouse held on one cell
+        new.render(display, offset)
+
+    report("render 640x480 (per tile, all off-grid)", timed(lambda: old.render(display, offset)))
+    report("render 640x480 (baked chunks)", timed(lambda: new.render(display, offset)))
+    report("render 640x480 (one tile edited, re-bakes)", timed(edited))
+    report("render 640x480 (same tile painted again)", timed(held))
+    report("render 640x480 (nothing baked yet)", timed(cold))
+    scroll = [(offset[0] + 4 * i, offset[1] + 3 * i) for i in range(200)]
+    report("scroll 200 frames (per tile)", timed(lambda: [old.render(display, o) for o in scroll], repeat=5))
+    report("scroll 200 frames (baked chunks)", timed(lambda: [new.render(display, o) for o in scroll], repeat=5))
+
+
+class ListEntity:
+    # the old PhysicsEntity state: pos and velocity as Python lists on the entity itself
+    def __init__(self, pos, size):
+        self.pos = list(pos)
+        self.size = size
+        self.velocity = [0, 0]
+
+    def rect(self):
+        return pygame.Rect(self.pos[0], self.pos[1], self.size[0], self.size[1])
+
+
+def old_physics_update(entity, tilemap, movement=(0, 0)):
+    # PhysicsEntity.update before the collision map: the 3x3 tiles around pos, new Rects and dict every call
+    entity.collisions = {"up": False, "down": False, "right": False, "left": False}
+    frame_movement = (movement[0] + entity.velocity[0], movement[1] + entity.velocity[1])
+    entity.pos[0] += frame_movement[0]
+    entity_rect = entity.rect()
+    for rect in tilemap.physics_rects_around(entity.pos):
+        if entity_rect.colliderect(rect):
+            if frame_movement[0] > 0:
+                entity_rect.right = rect.left
+                entity.collisions["right"] = True
+            if frame_movement[0] < 0:
+                entity_rect.left = rect.right
+                entity.collisions["left"] = True
+            entity.pos[0] = entity_rect.x
+    entity.pos[1] += frame_movement[1]
+    entity_rect = entity.rect()
+    for rect in tilemap.physics_rects_around(entity.pos):
+        if entity_rect.colliderect(rect):
+            if frame_movement[1] > 0:
+                entity_rect.bottom = rect.top
+                entity.collisions["down"] = True
+            if frame_movement[1] < 0:
+                entity_rect.top = rect.bottom
+                entity.collisions["up"] = True
+            entity.pos[1] = entity_rect.y
+    entity.velocity[1] = min(5, entity.velocity[1] + 0.1)
+    if entity.collisions["down"] or entity.collisions["up"]:
+        entity.velocity[1] = 0
+
+
+def physics_level(width=200, height=60, seed=0):
+    # a floor, side walls and some platforms to land on
+    from scripts.tilemap import Tilemap
+
+    rng = random.Random(seed)
+    tilemap = Tilemap(SimpleNamespace(assets={}))
+    for x in range(width):
+        tilemap.set_tile((x, height - 1), "floor", 0)
+    for y in range(height):
+        tilemap.set_tile((0, y), "wall", 0)
+        tilemap.set_tile((width - 1, y), "wall", 0)
+    for _ in range(150):
+        x, y = rng.randrange(2, width - 12), rng.randrange(5, height - 3)
+        for i in range(rng.randrange(3, 10)):
+            tilemap.set_tile((x + i, y), "floor", 0)
+    return tilemap
+
+
+def bench_collision():
+    from scripts.collision import CollisionMap
+    from scripts.entities import PhysicsEntity
+    from scripts.utils import Animation
+
+    print("collision: PhysicsEntity.update, 3x3 tile rects vs collision map + swept moves")
+    game = SimpleNamespace(assets={"blob/idle": Animation([pygame.Surface((8, 15))])})
+    tilemap = physics_level()
+    CollisionMap(tilemap)
+
+    # fast entities fall through a one-tile floor with the old update
+    from scripts.tilemap import Tilemap
+
+    thin = Tilemap(SimpleNamespace(assets={}))
+    for x in range(10):
+        thin.set_tile((x, 10), "floor", 0)
+    CollisionMap(thin)
+    for label, e, step in (("old", ListEntity((40, 0), (8, 15)), lambda e: old_physics_update(e, thin)),
+                           ("swept", PhysicsEntity(game, "blob", (40, 0), (8, 15)), lambda e: e.update(thin))):
+        for _ in range(20):
+            e.velocity[1] = 40
+            step(e)
+        print(f"  40 px/frame fall ({label}): ends at y={e.pos[1]:.0f}, standing on the floor is y={10 * 16 - 15}")
+
+    for count in (100, 500, 1000, 2000):
+        rng = random.Random(count)
+        starts = [(rng.uniform(20, 3150), rng.uniform(0, 900), rng.choice((-1, 0, 1))) for _ in range(count)]
+        old_entities = [ListEntity((x, y), (8, 15)) for x, y, _ in starts]
+        entities = [PhysicsEntity(game, "blob", (x, y), (8, 15)) for x, y, _ in starts]
+
+        def run(update, entities):
+            for e, (x, y, _) in zip(entities, starts):
+                e.pos[0], e.pos[1] = x, y
+                e.velocity[0] = e.velocity[1] = 0
+            for _ in range(60):
+                for e, (_, _, dx) in zip(entities, starts):
+                    update(e, (dx, 0))
+
+        old = timed(lambda: run(lambda e, m: old_physics_update(e, tilemap, m), old_entities), repeat=3) / 60
+        new = timed(lambda: run(lambda e, m: e.update(tilemap, m), entities), repeat=3) / 60
+        report(f"{count} entities, per frame (old)", old)
+        report(f"{count} entities, per frame (collision map)", new)
+
+
+def bench_startup():
+    import tempfile
+
+    from scripts.bundle import LazyAssets, pack, png_names
+    from scripts.utils import BASE_IMG_PATH, load_image
+
+    print("startup: every image folder in data/TinyHouse_Tiles_0.05")
+    folders = sorted(f for f in os.listdir(BASE_IMG_PATH) if os.path.isdir(BASE_IMG_PATH + f) and png_names(BASE_IMG_PATH + f))
+    groups = {f: f for f in folders}
+
+    def one_by_one():
+        # load_images, minus the .DS_Store files it would trip over
+        return {f: [load_image(f + "/" + name) for name in png_names(BASE_IMG_PATH + f)] for f in folders}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle = os.path.join(tmp, "tiles.bundle")
+        report("pack bundle", timed(lambda: pack(BASE_IMG_PATH, bundle), repeat=3))
+        old = one_by_one()
+        new = LazyAssets(groups, bundle_path=bundle)
+        pngs = LazyAssets(groups, bundle_path=os.path.join(tmp, "none"))
+        same = sum(pygame.image.tobytes(a, "RGB") == pygame.image.tobytes(b, "RGB") for f in folders for a, b in zip(pngs[f], new[f]))
+        same_old = sum(pygame.image.tobytes(a, "RGB") == pygame.image.tobytes(b, "RGB") for f in folders for a, b in zip(old[f], pngs[f]))
+        count = sum(len(v) for v in old.values())
+        print(f"  {len(folders)} folders, {count} images; load_image == pngs for {same_old}, == bundle for {same}")
+        assert same == same_old == count, "the editor must draw the same pixels as the game"
+        report("load_images per folder", timed(one_by_one, repeat=5))
+        report("pngs, no bundle, all groups", timed(lambda: dict(LazyAssets(groups, bundle_path=os.path.join(tmp, "none"))), repeat=5))
+        report("bundle, all groups", timed(lambda: dict(LazyAssets(groups, bundle_path=bundle)), repeat=5))
+        editor = ["Floor 64px", "Wall 64px", "Bed"]
+        report("bundle, open + the editor's 3 groups", timed(lambda: [LazyAssets(groups, bundle_path=bundle)[f] for f in editor], repeat=5))
+
+
+def bench_blits():
+    from scripts.entities import PhysicsEntity, render_entities
+    from scripts.tilemap import Tilemap
+    from scripts.utils import Animation
+
+    print("blits: a full 640x480 viewport of 16px tiles")
+    # the editor's floor/wall variants shrunk to one 16px cell each, so every cell on screen is its own blit
+    big = editor_assets()
+    assets = {name: [pygame.transform.scale(img, (16, 16)) for img in imgs] for name, imgs in big.items()}
+    for imgs in assets.values():
+        for img in imgs:
+            img.set_colorkey((0, 0, 0)) # scale() drops it; load_image would have set it
+    rng = random.Random(0)
+    cells = [(x, y, *rng.choice([(n, v) for n in assets for v in range(len(assets[n]))])) for x in range(41) for y in range(31)]
+    display = pygame.Surface((640, 480))
+    own = [(assets[n][v], (x * 16 - 8, y * 16 - 8)) for x, y, n, v in cells]
+
+    def one_by_one():
+        for img, dest in own:
+            display.blit(img, dest)
+
+    report(f"{len(cells)} blits, one call each", timed(one_by_one))
+    report(f"{len(cells)} blits, one blits() call", timed(lambda: display.blits(own, doreturn=False)))
+
+    tilemap = Tilemap(SimpleNamespace(assets=assets))
+    for x, y, n, v in cells:
+        tilemap.set_tile((x, y), n, v)
+    tilemap.render(display, (8, 8))
+
+    def cold():
+        tilemap.baked.clear()
+        tilemap.render(display, (8, 8))
+
+    report("Tilemap.render, every chunk baked", timed(cold))
+    report("Tilemap.render, already baked", timed(lambda: tilemap.render(display, (8, 8))))
+
+    game = SimpleNamespace(assets={"blob/idle": Animation([assets["bed"][0]])})
+    entities = [PhysicsEntity(game, "blob", (rng.uniform(0, 600), rng.uniform(0, 440)), (8, 15)) for _ in range(500)]
+
+    def each():
+        for e in entities:
+            e.render(display)
+
+    report("500 entities, render() each", timed(each))
+    report("500 entities, render_entities", timed(lambda: render_entities(display, entities)))
+
+
+def bench_sprites():
+    from scripts.entities import PhysicsEntity, render_entities
+    from scripts.utils import Animation, load_images
+
+    print("sprites: 500 animated entities, half of them facing left")
+    frames = load_images("Cat_Ani")
+    game = SimpleNamespace(assets={"cat/idle": Animation(frames, img_dur=5)})
+    rng = random.Random(0)
+    entities = [PhysicsEntity(game, "cat", (rng.uniform(0, 600), rng.uniform(0, 440)), (16, 16)) for _ in range(500)]
+    for i, e in enumerate(entities):
+        e.flip = i % 2 == 1
+        e.animation.frame = rng.randrange(5 * len(frames))
+    display = pygame.Surface((640, 480))
+
+    def flip_each_frame():
+        # the old render: a fresh flipped copy of the image for every entity, every frame
+        for e in entities:
+            e.animation.update()
+            display.blit(pygame.transform.flip(e.animation.img(), e.flip, False), (e.pos[0] + e.anim_offset[0], e.pos[1] + e.anim_offset[1]))
+
+    def pre_flipped():
+        for e in entities:
+            e.animation.update()
+            e.render(display)
+
+    def batched():
+        for e in entities:
+            e.animation.update()
+        render_entities(display, entities)
+
+    report("flip every frame", timed(flip_each_frame))
+    report("pre-flipped frames, render()", timed(pre_flipped))
+    report("pre-flipped frames, render_entities", timed(batched))
+    report("loading the animation (both directions)", timed(lambda: Animation(frames, img_dur=5)))
+
+
+class CopiedAnimation:
+    # the animation every entity used to get its own copy of on each action change
+    def __init__(self, images, img_dur=5, loop=True):
+        self.images = images
+        self.loop = loop
+        self.img_duration = img_dur
+        self.done = False
+        self.frame = 0
+
+    def copy(self):
+        return CopiedAnimation(self.images, self.img_duration, self.loop)
+
+
+def bench_animation():
+    from scripts.entities import IDLE, WALKING, Player
+    from scripts.utils import Animation, load_images
+
+    print("animation: switching actions on 500 players every frame")
+    frames = load_images("Cat_Ani")
+    old_assets = {"player/idle": CopiedAnimation(frames[:5]), "player/walking": CopiedAnimation(frames[5:])}
+    game = SimpleNamespace(assets={"player/idle": Animation(frames[:5]), "player/walking": Animation(frames[5:])})
+    players = [Player(game, (0, 0), (8, 15)) for _ in range(500)]
+    old_state = [["", None] for _ in players] # (action, animation) the way set_action used to keep them
+
+    def old_switch(frame):
+        action = "walking" if frame % 2 else "idle"
+        for state in old_state:
+            if action != state[0]:
+                state[0] = action
+                state[1] = old_assets["player" + "/" + action].copy()
+
+    def new_switch(frame):
+        action = WALKING if frame % 2 else IDLE
+        for p in players:
+            p.set_action(action)
+
+    report("500 action changes (copy per change)", timed(lambda: [old_switch(f) for f in range(2)]) / 2)
+    report("500 action changes (shared frames, ids)", timed(lambda: [new_switch(f) for f in range(2)]) / 2)
+    old_anim = old_state[0][1]
+    print(f"  animation state per entity: copied {sys.getsizeof(old_anim) + sys.getsizeof(old_anim.__dict__)} bytes, "
+          f"playback {sys.getsizeof(players[0].animation)} bytes")
+
+
+def bench_physics():
+    import numpy as np
+
+    from scripts.collision import CollisionMap
+    from scripts.entities import PhysicsEntity, update_entities
+    from scripts.utils import Animation
+
+    print("physics: update() per entity vs one EntityManager.step for all")
+    tilemap = physics_level()
+    CollisionMap(tilemap)
+    for count in (500, 2000, 10000):
+        rng = random.Random(count)
+        # anywhere, walls included: both paths use the same CollisionMap runs, so even stuck entities end up in the same place
+        starts = [(rng.uniform(20, 3150), rng.uniform(0, 900), rng.choice((-1, 0, 1))) for _ in range(count)]
+        games = [SimpleNamespace(assets={"blob/idle": Animation([pygame.Surface((8, 15))])}) for _ in range(2)]
+        one_by_one = [PhysicsEntity(games[0], "blob", (x, y), (8, 15)) for x, y, _ in starts]
+        batched = [PhysicsEntity(games[1], "blob", (x, y), (8, 15)) for x, y, _ in starts]
+        for e, (_, _, dx) in zip(batched, starts):
+            e.movement = (dx, 0)
+
+        def reset(game):
+            game.physics.pos[:count] = [(x, y) for x, y, _ in starts]
+            game.physics.velocity[:count] = 0
+
+        def each():
+            reset(games[0])
+            for _ in range(60):
+                for e, (_, _, dx) in zip(one_by_one, starts):
+                    e.update(tilemap, (dx, 0))
+
+        def batch():
+            reset(games[1])
+            for _ in range(60):
+                update_entities(games[1], batched, tilemap)
+
+        def step_only():
+            reset(games[1])
+            for _ in range(60):
+                games[1].physics.step(tilemap)
+
+        repeat = 3 if count < 10000 else 1
+        report(f"{count} entities, per frame (update each)", timed(each, repeat=repeat) / 60)
+        report(f"{count} entities, per frame (update_entities)", timed(batch, repeat=repeat) / 60)
+        report(f"{count} entities, per frame (step, physics only)", timed(step_only, repeat=repeat) / 60)
+        each()
+        batch()
+        drift = np.abs(games[0].physics.pos[:count] - games[1].physics.pos[:count]).max()
+        print(f"  after 60 frames the two agree to within {drift:.2g} px")
+
+    # the editor changing a tile every frame, with a second island far away: only the tile rows entities are near
+    # have their runs copied out of the CollisionMap, and only again after an edit
+    manager = games[1].physics
+    tilemap.set_tile((10 ** 5, 10 ** 5), "wall", 0)
+    edits = iter(range(10 ** 9))
+
+    def edit_and_step():
+        reset(games[1])
+        for _ in range(60):
+            tilemap.set_tile((100, 40), ("floor", "wall")[next(edits) % 2], 0)
+            manager.step(tilemap)
+
+    report(f"{count} entities, step + a tile edited per frame", timed(edit_and_step, repeat=1) / 60)
+    print(f"  runs copied for {len(manager.known_rows)} tile rows, {len(manager.run_row)} runs")
+
+
+BENCHMARKS = {
+    "tilemap": bench_tilemap,
+    "chunk_render": bench_chunk_render,
+    "collision": bench_collision,
+    "startup": bench_startup,
+    "blits": bench_blits,
+    "sprites": bench_sprites,
+    "animation": bench_animation,
+    "physics": bench_physics,
+}
+
+
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(os.path.dirname(here))
+    sys.path.insert(0, here)
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    for name in sys.argv[1:] or list(BENCHMARKS):
+        BENCHMARKS[name]()
@@ -0,0 +1,18 @@
+import sys
+import time
+import pygame
+
+from scripts.bundle import default_bundle_path, pack
+from scripts.utils import BASE_IMG_PATH
+
+# packs every image folder into one bundle file the game can mmap at startup (see scripts/bundle.py)
+# run from the repository root, like the editor: python "final game project/bundle_assets.py" [image folder] [bundle file]
+# run it again after changing the art; until then the changed folders are just loaded from the pngs
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else BASE_IMG_PATH
+    out = sys.argv[2] if len(sys.argv) > 2 else default_bundle_path(root)
+    pygame.init()
+    t0 = time.perf_counter()
+    count = pack(root, out)
+    print(f"packed {count} images into {out} in {time.perf_counter() - t0:.2f}s")
@@ -1,7 +1,7 @@
 import sys
 import pygame
 
-from scripts.utils import load_images # some imports were not needed
+from scripts.bundle import LazyAssets # some imports were not needed
 from scripts.tilemap import Tilemap
 
 RENDER_SCALE = 2.2 # render scale to determine how much to multiply the pixels
@@ -16,11 +16,11 @@ class Editor:
 
         self.clock = pygame.time.Clock()
  
-        self.assets = { # trim this down
-            "floor": load_images("Floor 64px"),
-            "wall": load_images("Wall 64px"),
-            "bed": load_images("Bed")
-        }
+        self.assets = LazyAssets({ # trim this down; name -> image folder, read from the asset bundle when there is one
+            "floor": "Floor 64px",
+            "wall": "Wall 64px",
+            "bed": "Bed"
+        })
 
         self.movement = [False, False, False, False] # you'd still want to keep this so you can move your camera around
         # removed the Player and Clouds class
@@ -76,11 +76,9 @@ class Editor:
                 self.display.blit(current_tile_img, mpos) # off-grid tile position requires no crazy math
             
             if self.clicking and self.ongrid: # for placing tiles ongrid
-                self.tilemap.tilemap[str(tile_pos[0]) + ";" + str(tile_pos[1])] = {"type": self.tile_list[self.tile_group], "variant": self.tile_variant, "pos": tile_pos} # converting the index selection to the string name of the group and variant
+                self.tilemap.set_tile(tile_pos, self.tile_list[self.tile_group], self.tile_variant) # converting the index selection to the string name of the group and variant
             if self.right_clicking: # for deleting tiles
-                tile_loc = str(tile_pos[0]) + ";" + str(tile_pos[1])
-                if tile_loc in self.tilemap.tilemap: # this means that the location that we're hovering exits
-                    del self.tilemap.tilemap[tile_loc]
+                self.tilemap.remove_tile(tile_pos) # does nothing if there's no tile where we're hovering
                 f"""
                 Unoptimized for the level editor but that's ok because it's not the main game.
                 """
@@ -88,7 +86,7 @@ class Editor:
                     tile_img = self.assets[tile["type"]][tile["variant"]] # next we need to get the bounding box of the image to delete
                     tile_r = pygame.Rect(tile["pos"][0] - self.scroll[0], tile["pos"][1] - self.scroll[1], tile_img.get_width(), tile_img.get_height()) # can do it the other way around by just adding the mouse position
                     if tile_r.collidepoint(mpos): # you can collide with points just like with rectangles
-                        self.tilemap.offgrid_tiles.remove(tile) # remove the tile (same as using the 'del' keyword)
+                        self.tilemap.remove_offgrid(tile) # remove the tile from the list and from its chunk
                         
             self.display.blit(current_tile_img, (5, 5))
             
@@ -100,7 +98,7 @@ class Editor:
                     if event.button == 1:
                         self.clicking = True
                         if not self.ongrid: # if this is not accounted for, then offgrid tiles would be placed 60 times per second
-                            self.tilemap.offgrid_tiles.append({"type": self.tile_list[self.tile_group], "variant": self.tile_variant, "pos": (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])}) # we must account for the scroll position because the coordinate of the camera is not the same as the coordinate of the world
+                            self.tilemap.add_offgrid(self.tile_list[self.tile_group], self.tile_variant, (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])) # we must account for the scroll position because the coordinate of the camera is not the same as the coordinate of the world
                     if event.button == 3: # for right clicking; very similar layout to tkinter
                         self.right_clicking = True
                     if self.shift: # nested loop for variant choosing
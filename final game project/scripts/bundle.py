@@ -0,0 +1,130 @@
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+
+import pygame
+
+from scripts.utils import BASE_IMG_PATH
+
+# file layout: MAGIC, the length of the JSON index, the index, then every frame's pixels back to back
+# pixels are RGBX as the png stores them; like load_image, the alpha channel is dropped and black is the colorkey
+MAGIC = b"TILEBND2" # 1 held premultiplied RGBA
+HEADER = struct.Struct("<8sI")
+ALIGN = 16
+
+def default_bundle_path(root=BASE_IMG_PATH):
+    return root.rstrip("/") + ".bundle" # e.g. data/TinyHouse_Tiles_0.05.bundle, next to the folder it was made from
+
+def png_names(folder):
+    return sorted(name for name in os.listdir(folder) if name.lower().endswith(".png")) # skips .DS_Store and friends
+
+def finish(img):
+    # the rest of load_image: the very same surface whether it came from a png or the bundle
+    img = img.convert()
+    img.set_colorkey((0, 0, 0))
+    return img
+
+def pack(root=BASE_IMG_PATH, out=None):
+    # every folder under root with pngs in it becomes a group, same as what load_images(folder) would return
+    out = out or default_bundle_path(root)
+    groups = {}
+    for folder in sorted(os.listdir(root)):
+        if os.path.isdir(os.path.join(root, folder)):
+            names = png_names(os.path.join(root, folder))
+            if names:
+                groups[folder] = names
+
+    index, chunks, offset = {}, [], 0
+    for folder, names in groups.items():
+        frames = []
+        for name in names:
+            path = os.path.join(root, folder, name)
+            img = pygame.image.load(path)
+            (w, h), pixels = img.get_size(), pygame.image.tobytes(img, "RGBX")
+            frames.append([name, os.stat(path).st_mtime_ns, offset, w, h])
+            chunks.append(pixels)
+            offset += len(pixels) # always a multiple of 4, so every frame stays 4-byte aligned
+        index[folder] = frames
+
+    index_bytes = json.dumps(index).encode("utf-8")
+    start = -(-(HEADER.size + len(index_bytes)) // ALIGN) * ALIGN
+    tmp = out + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(HEADER.pack(MAGIC, len(index_bytes)))
+        fh.write(index_bytes)
+        fh.write(bytes(start - HEADER.size - len(index_bytes)))
+        for pixels in chunks:
+            fh.write(pixels)
+    os.replace(tmp, out) # never leave a half-written bundle where the game would find it
+    return sum(len(names) for names in groups.values())
+
+def to_surface(size, pixels):
+    return finish(pygame.image.frombuffer(pixels, size, "RGBX"))
+
+class AssetBundle:
+    # a packed bundle opened with mmap; frames are only turned into surfaces when a group is asked for
+    def __init__(self, path):
+        self.fh = open(path, "rb")
+        self.mm = mmap.mmap(self.fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_len = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path!r} is not an asset bundle")
+        self.index = json.loads(self.mm[HEADER.size:HEADER.size + index_len])
+        self.start = -(-(HEADER.size + index_len) // ALIGN) * ALIGN
+        self.view = memoryview(self.mm)
+
+    def fresh(self, folder, root=BASE_IMG_PATH):
+        # the bundled frames still match the pngs on disk (same files, none touched since packing)
+        frames = self.index.get(folder)
+        if frames is None:
+            return False
+        path = os.path.join(root, folder)
+        try:
+            names = png_names(path)
+        except FileNotFoundError:
+            return True # only the bundle was shipped
+        return names == [f[0] for f in frames] and all(os.stat(os.path.join(path, f[0])).st_mtime_ns == f[1] for f in frames)
+
+    def frames(self, folder):
+        images = []
+        for name, mtime, offset, w, h in self.index[folder]:
+            images.append(to_surface((w, h), self.view[self.start + offset:self.start + offset + w * h * 4])) # no copy until convert()
+        return images
+
+class LazyAssets(Mapping):
+    # a drop-in for the {"name": load_images(folder)} dict: groups come out of the bundle when it's up to date,
+    # anything else is read from its pngs, and only when it's first asked for
+    # either way a frame ends up as load_image would make it, so the editor draws exactly what the game does
+    def __init__(self, groups, root=BASE_IMG_PATH, bundle_path=None):
+        self.groups = dict(groups) # name -> folder under root
+        self.root = root
+        self.loaded = {}
+        self.bundle = None
+        bundle_path = bundle_path or default_bundle_path(root)
+        if os.path.exists(bundle_path):
+            try:
+                self.bundle = AssetBundle(bundle_path)
+            except (ValueError, struct.error) as exc: # a broken bundle just means loading the pngs
+                print(f"ignoring asset bundle {bundle_path!r}: {exc}")
+
+    def __getitem__(self, name):
+        images = self.loaded.get(name)
+        if images is None:
+            if name not in self.groups:
+                raise KeyError(name)
+            folder = self.groups[name]
+            if self.bundle is not None and self.bundle.fresh(folder, self.root):
+                images = self.bundle.frames(folder)
+            else: # no bundle, or the pngs changed since packing
+                path = os.path.join(self.root, folder)
+                images = [finish(pygame.image.load(os.path.join(path, png))) for png in png_names(path)]
+            self.loaded[name] = images
+        return images
+
+    def __iter__(self):
+        return iter(self.groups)
+
+    def __len__(self):
+        return len(self.groups)
@@ -0,0 +1,103 @@
+from bisect import bisect_left, bisect_right
+
+import pygame
+
+from scripts.tilemap import CHUNK_SHIFT, CHUNK_SIZE, CHUNK_MASK
+
+class CollisionMap:
+    # the solid tiles of a Tilemap, merged into horizontal runs (one Rect per run of solid tiles in a tile row)
+    # each row's runs are built once, the first time something collides there, and thrown away when a chunk the row crosses is edited
+    # runs in a row are sorted left to right and never overlap, so a query bisects to the one that matters instead of looping
+    def __init__(self, tilemap):
+        self.tilemap = tilemap
+        self.rows = {} # tile y -> (Rects left to right, their lefts, their rights)
+        self.bands = {} # chunk y -> sorted chunk xs that have tiles, so building a row doesn't look at every chunk
+        self.found = [] # reused by rects_in, so queries don't allocate a new list every time
+        tilemap.collision = self # so set_tile/remove_tile/load can tell us when something changed
+
+    def forget(self, key):
+        self.bands.pop(key[1], None)
+        for ty in range(key[1] << CHUNK_SHIFT, (key[1] + 1) << CHUNK_SHIFT):
+            self.rows.pop(ty, None)
+
+    def clear(self):
+        self.rows.clear()
+        self.bands.clear()
+
+    def row(self, ty):
+        row = self.rows.get(ty)
+        if row is None:
+            row = self.rows[ty] = self.build(ty)
+        return row
+
+    def build(self, ty):
+        cy, base = ty >> CHUNK_SHIFT, (ty & CHUNK_MASK) << CHUNK_SHIFT
+        band = self.bands.get(cy)
+        if band is None:
+            band = self.bands[cy] = sorted(cx for cx, y in self.tilemap.chunks if y == cy)
+        solid = self.tilemap.solid
+        ts = self.tilemap.tile_size
+        rects = []
+        start = end = None # tile xs of the run we're in, end exclusive; runs carry on across chunk edges
+        for cx in band:
+            types = self.tilemap.chunks[(cx, cy)].types
+            for lx in range(CHUNK_SIZE):
+                if solid[types[base | lx]]:
+                    tx = (cx << CHUNK_SHIFT) | lx
+                    if tx != end:
+                        if start is not None:
+                            rects.append(pygame.Rect(start * ts, ty * ts, (end - start) * ts, ts))
+                        start = tx
+                    end = tx + 1
+        if start is not None:
+            rects.append(pygame.Rect(start * ts, ty * ts, (end - start) * ts, ts))
+        return rects, [rect.left for rect in rects], [rect.right for rect in rects]
+
+    def rects_in(self, left, top, right, bottom):
+        # every solid run overlapping the box (edges touching don't count); the list is reused on the next call
+        found = self.found
+        found.clear()
+        ts = self.tilemap.tile_size
+        for ty in range(int(top // ts), int(-(-bottom // ts))):
+            rects, lefts, rights = self.row(ty)
+            i = bisect_right(rights, left) # the first run ending past left
+            while i < len(rects) and lefts[i] < right:
+                found.append(rects[i])
+                i += 1
+        return found
+
+    # swept movement along one axis: everything between where the entity is and where it wants to be is checked,
+    # so a fast entity stops at the first wall instead of jumping over it. returns (new position, whether it hit)
+    # only walls ahead of the entity count; one it's already overlapping (spawned inside a wall, say) doesn't shove it back
+    def sweep_x(self, x, y, w, h, dx):
+        if not dx:
+            return x, False
+        ts = self.tilemap.tile_size
+        new_x, hit = x + dx, False
+        for ty in range(int(y // ts), int(-(-(y + h) // ts))):
+            rects, lefts, rights = self.row(ty)
+            if dx > 0:
+                i = bisect_left(lefts, x + w) # the nearest run starting at or past the entity's right side
+                if i < len(lefts) and lefts[i] - w < new_x:
+                    new_x, hit = lefts[i] - w, True
+            else:
+                i = bisect_right(rights, x) - 1 # the nearest run ending at or before its left side
+                if i >= 0 and rights[i] > new_x:
+                    new_x, hit = rights[i], True
+        return new_x, hit
+
+    def sweep_y(self, x, y, w, h, dy):
+        # rows are checked nearest first, so the first one with a run under/over the entity is where it stops
+        if not dy:
+            return y, False
+        ts = self.tilemap.tile_size
+        if dy > 0:
+            rows = range(int(-(-(y + h) // ts)), int(-(-(y + h + dy) // ts))) # tops at or below the feet, within reach
+        else:
+            rows = range(int(y // ts) - 1, int((y + dy) // ts) - 1, -1) # bottoms at or above the head, within reach
+        for ty in rows:
+            rects, lefts, rights = self.row(ty)
+            i = bisect_right(rights, x) # the first run ending past the entity's left side
+            if i < len(rects) and lefts[i] < x + w:
+                return (ty * ts - h if dy > 0 else (ty + 1) * ts), True
+        return y + dy, False
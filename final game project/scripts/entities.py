@@ -1,86 +1,161 @@
 import pygame
 
+from scripts.collision import CollisionMap
+from scripts.physics import DOWN, GRAVITY, LEFT, MAX_FALL, RIGHT, UP, CollisionFlags, EntityManager
+from scripts.utils import AnimationLibrary, Playback, action_id
+
+IDLE = action_id("idle")
+WALKING = action_id("walking")
+
 class PhysicsEntity:
+    # pos, velocity, size, flip and collisions live in a row of the game's EntityManager (scripts/physics.py);
+    # the properties below make them look like plain attributes, and pos/velocity can still be changed with pos[0] += ...
     def __init__(self, game, e_type, pos, size):
         self.game = game
         self.type = e_type
-        self.pos = list(pos)
-        self.size = size
-        self.velocity = [0, 0]
-        self.collisions = {"up": False, "down": False, "right": False, "left": False}
+        if not hasattr(game, "physics"): # one manager per game, shared by every entity
+            game.physics = EntityManager()
+        self.manager = game.physics
+        self.index = self.manager.add(pos, size)
+        self._size = tuple(size)
+        self.collisions = CollisionFlags(self.manager, self.index) # collisions["down"] etc. like before
 
-        self.action = "" # start of new code
+        self.action = -1 # start of new code; an action id from scripts.utils.action_id, -1 until the first set_action
         self.anim_offset = (-3,-3) # animations themselves will have varying dimensions unless there's padding
-        self.flip = False # this will allow us to make our character either look left or look right
-        self.set_action("idle") # new method implemented
+        # flip (in the manager) will allow us to make our character either look left or look right
+        if not hasattr(game, "animations"): # one library per game, shared by every entity
+            game.animations = AnimationLibrary(game.assets)
+        self.animation = None
+        self.set_action(IDLE) # new method implemented
         
+    @property
+    def pos(self):
+        return self.manager.pos[self.index]
+
+    @pos.setter
+    def pos(self, value):
+        self.manager.pos[self.index] = value
+
+    @property
+    def velocity(self):
+        return self.manager.velocity[self.index]
+
+    @velocity.setter
+    def velocity(self, value):
+        self.manager.velocity[self.index] = value
+
+    @property
+    def movement(self): # input for the next EntityManager.step, same as the movement argument of update
+        return self.manager.movement[self.index]
+
+    @movement.setter
+    def movement(self, value):
+        self.manager.movement[self.index] = value
+
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, value):
+        self._size = tuple(value)
+        self.manager.size[self.index] = value
+
+    @property
+    def flip(self):
+        return bool(self.manager.flip[self.index])
+
+    @flip.setter
+    def flip(self, value):
+        self.manager.flip[self.index] = value
+
+    def kill(self): # gives the row back to the manager; don't use the entity after this
+        self.manager.remove(self.index)
+
     def rect(self):
-        return pygame.Rect(self.pos[0], self.pos[1], self.size[0], self.size[1])
+        x, y = self.manager.pos[self.index].tolist()
+        return pygame.Rect(x, y, self.size[0], self.size[1])
 
-    def set_action(self, action): # action parameter is the string name of the given animation
+    def set_action(self, action): # action parameter is an action id like IDLE (a name like "idle" works too)
+        if isinstance(action, str):
+            action = action_id(action)
         if action != self.action: # check if the animation type has actually change to prevent being permanently stuck at the 0th frame
             self.action = action # update the instance attribute
-            self.animation = self.game.assets[self.type + "/" + self.action].copy() # pull the assets 
+            anim = self.game.animations.table(self.type)[action] # shared frames; nothing is copied
+            if self.animation is None:
+                self.animation = Playback(anim)
+            else:
+                self.animation.play(anim) # same playback object, just pointed at the other animation
     
-    def update(self, tilemap, movement=(0, 0)): 
-        self.collisions = {"up": False, "down": False, "right": False, "left": False} 
-        frame_movement = (movement[0] + self.velocity[0], movement[1] + self.velocity[1])
-
-        self.pos[0] += frame_movement[0] 
-        entity_rect = self.rect()
-        for rect in tilemap.physics_rects_around(self.pos):
-            if entity_rect.colliderect(rect): 
-                if frame_movement[0] > 0: 
-                    entity_rect.right = rect.left
-                    self.collisions["right"] = True
-                if frame_movement[0] < 0:
-                    entity_rect.left = rect.right 
-                    self.collisions["left"] = True
-                self.pos[0] = entity_rect.x 
-                
-        self.pos[1] += frame_movement[1]
-        entity_rect = self.rect() 
-        for rect in tilemap.physics_rects_around(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[1] > 0:
-                    entity_rect.bottom = rect.top 
-                    self.collisions["down"] = True
-                if frame_movement[1] < 0:
-                    entity_rect.top = rect.bottom
-                    self.collisions["up"] = True
-                self.pos[1] = entity_rect.y
+    def update(self, tilemap, movement=(0, 0)): # one entity on its own; EntityManager.step does the same for all of them at once
+        manager, i = self.manager, self.index
+        x, y = manager.pos[i].tolist() # plain floats for the maths, written back at the end
+        vx, vy = manager.velocity[i].tolist()
+        w, h = self._size
+        collisions = [False, False, False, False] # up, down, right, left; written to the manager in one go at the end
+        frame_movement = (movement[0] + vx, movement[1] + vy)
+        collision_map = tilemap.collision or CollisionMap(tilemap) # made the first time anything collides with this map
+
+        # x first, then y; each sweep checks the whole path, so a big velocity can't skip over a thin wall
+        x, hit = collision_map.sweep_x(x, y, w, h, frame_movement[0])
+        if hit:
+            collisions[RIGHT if frame_movement[0] > 0 else LEFT] = True
+
+        y, hit = collision_map.sweep_y(x, y, w, h, frame_movement[1])
+        if hit:
+            collisions[DOWN if frame_movement[1] > 0 else UP] = True
 
         if movement[0] > 0: # if you're moving right
-            self.flip = False # the images by default face right, so this is false
+            manager.flip[i] = False # the images by default face right, so this is false
         if movement[0] < 0: # and vice versa
-            self.flip = True
+            manager.flip[i] = True
+
+        vy = min(MAX_FALL, vy + GRAVITY)
+        if collisions[DOWN] or collisions[UP]:
+            vy = 0
+        manager.pos[i] = (x, y)
+        manager.velocity[i] = (vx, vy)
+        manager.collisions[i] = collisions
 
-        self.velocity[1] = min(5, self.velocity[1] + 0.1) 
-        if self.collisions["down"] or self.collisions["up"]:
-            self.velocity[1] = 0
+        self.animate(movement)
 
+    def animate(self, movement=(0, 0)): # everything update does after the physics
         self.animation.update() # important code to call link the update functions() together
 
-    def render(self, surf, offset=(0, 0)):
-        surf.blit(
-            pygame.transform.flip(self.animation.img(), self.flip, False),
-            (self.pos[0] - offset[0] + self.anim_offset[0], # a pattern can be seen to emerge here;
-             self.pos[1] - offset[1] + self.anim_offset[1]) # any offset that benefit us need to be accounted for during rendering
+    def blit_args(self, offset=(0, 0)): # what render passes to blit, so render_entities can batch a whole list
+        x, y = self.manager.pos[self.index].tolist()
+        return (
+            self.animation.img(self.manager.flip[self.index]), # both directions were made when the animation was loaded; no flipping here
+            (x - offset[0] + self.anim_offset[0], # a pattern can be seen to emerge here;
+             y - offset[1] + self.anim_offset[1]) # any offset that benefit us need to be accounted for during rendering
         )
 
+    def render(self, surf, offset=(0, 0)):
+        surf.blit(*self.blit_args(offset))
+
 class Player(PhysicsEntity): # child class of the PhysicsEntity class
     def __init__(self, game, pos, size):
         super().__init__(game, "player", pos, size) # inheritance method; initialize the parent class
         self.air_time = 0
         
-    def update(self, tilemap, movement=(0, 0)):
-        super().update(tilemap, movement=movement)
+    def animate(self, movement=(0, 0)):
+        super().animate(movement=movement)
 
         self.air_time += 1
         if self.collisions["down"]:
             self.air_time = 0
 
         if movement[0] != 0: #  if the x-axis of our movement is not 0
-            self.set_action("walking") # it means we should be walking
+            self.set_action(WALKING) # it means we should be walking
         else: # and if nothing else we're definitely idle
-            self.set_action("idle")
\ No newline at end of file
+            self.set_action(IDLE)
+
+def render_entities(surf, entities, offset=(0, 0)): # one blits() call for the lot instead of a blit per entity
+    surf.blits([entity.blit_args(offset) for entity in entities], doreturn=False)
+
+def update_entities(game, entities, tilemap):
+    # the batched version of calling update on each entity: set each one's movement first, then one physics step for all
+    game.physics.step(tilemap)
+    movement = game.physics.movement
+    for entity in entities:
+        entity.animate(movement[entity.index])
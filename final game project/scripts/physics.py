@@ -0,0 +1,205 @@
+import numpy as np
+
+from scripts.collision import CollisionMap
+
+GRAVITY = 0.1
+MAX_FALL = 5
+UP, DOWN, RIGHT, LEFT = range(4) # columns of EntityManager.collisions
+SIDES = {"up": UP, "down": DOWN, "right": RIGHT, "left": LEFT}
+
+def run_key(ty, px):
+    # a tile row and a whole-pixel x as one int64 that sorts by row, then x; works on numbers and numpy arrays alike
+    return (ty << 33) + (px + (1 << 32))
+
+class EntityManager:
+    # positions, velocities, sizes and collision flags of every entity, one row each, in numpy arrays
+    # step() runs the same physics as PhysicsEntity.update (gravity, x move, y move, tile collisions) for all of them at once,
+    # against the same CollisionMap runs, so moving an entity either way ends up in exactly the same place
+    # PhysicsEntity just holds its row number and reads/writes its row, so gameplay code doesn't see the arrays
+    def __init__(self, capacity=64):
+        self.count = 0 # rows in use up to here; removed rows in between are reused first
+        self.free = []
+        self.alloc(capacity)
+        # the CollisionMap runs of the tile rows entities have been near, flattened: one entry per run, sorted by tile row then x
+        self.known_rows = np.zeros(0, dtype=np.int64) # those tile rows, sorted
+        self.run_row = self.run_left = self.run_right = np.zeros(0, dtype=np.int64)
+        self.left_keys = self.right_keys = np.zeros(0, dtype=np.int64) # run_key(row, left/right), for searchsorted
+        self.runs_tilemap = None
+        self.runs_version = None
+        # per row passed to sync_runs: the first and (exclusive) last tile row it can touch this frame
+        self.near_rows = self.near_lo = self.near_hi = None
+        # rows in tile row then x order, kept from frame to frame; searchsorted is several times faster on sorted queries,
+        # and entities hardly move in a frame, so re-sorting last frame's order is cheap
+        self.order_rows = self.order = None
+
+    def alloc(self, capacity):
+        old = getattr(self, "pos", None)
+        arrays = {
+            "pos": np.zeros((capacity, 2)),
+            "velocity": np.zeros((capacity, 2)),
+            "size": np.zeros((capacity, 2)),
+            "movement": np.zeros((capacity, 2)), # this frame's input, added to the velocity like update's movement
+            "collisions": np.zeros((capacity, 4), dtype=bool),
+            "flip": np.zeros(capacity, dtype=bool),
+            "alive": np.zeros(capacity, dtype=bool),
+        }
+        for name, array in arrays.items():
+            if old is not None:
+                array[:self.count] = getattr(self, name)[:self.count] # growing; keep what's there
+            setattr(self, name, array)
+
+    def add(self, pos, size):
+        if self.free:
+            i = self.free.pop()
+        else:
+            if self.count == len(self.pos):
+                self.alloc(len(self.pos) * 2)
+            i = self.count
+            self.count += 1
+        self.pos[i] = pos
+        self.size[i] = size
+        self.velocity[i] = self.movement[i] = 0
+        self.collisions[i] = self.flip[i] = False
+        self.alive[i] = True
+        return i
+
+    def remove(self, i):
+        self.alive[i] = False
+        self.velocity[i] = self.movement[i] = 0
+        self.free.append(i)
+
+    def sync_runs(self, tilemap, ts, rows, move):
+        # copies the CollisionMap runs of every tile row an entity can touch this frame into the run_* arrays;
+        # the runs themselves are CollisionMap's, so the batched and per-entity physics can never disagree about walls
+        collision_map = tilemap.collision or CollisionMap(tilemap)
+        y, h = self.pos[rows, 1], self.size[rows, 1]
+        lo = np.floor(np.minimum(y, y + move) / ts).astype(np.int64) - 1 # a row above and below for the y sweep
+        hi = np.ceil((np.maximum(y, y + move) + h) / ts).astype(np.int64) + 1
+        if tilemap is not self.runs_tilemap: # a different map; nothing copied applies
+            self.known_rows = np.zeros(0, dtype=np.int64)
+            self.runs_tilemap, self.runs_version = tilemap, None
+            self.near_rows = None
+        if self.near_rows is not None and np.array_equal(rows, self.near_rows):
+            check = np.flatnonzero((lo != self.near_lo) | (hi != self.near_hi)) # only entities that moved to another tile row
+        else:
+            check = np.arange(len(rows))
+        self.near_rows, self.near_lo, self.near_hi = rows, lo, hi
+        missing = np.zeros(0, dtype=np.int64)
+        if len(check):
+            lo, hi = lo[check], hi[check]
+            span = np.arange(int((hi - lo).max()))
+            needed = (lo[:, None] + span)[lo[:, None] + span < hi[:, None]]
+            missing = needed[~np.isin(needed, self.known_rows)] # tile rows no entity has been near before
+        if not len(missing) and tilemap.version == self.runs_version:
+            return
+        # after an edit every known row is copied again; CollisionMap only rebuilds the rows the edit touched
+        self.known_rows = np.union1d(self.known_rows, missing)
+        self.runs_version = tilemap.version
+
+        ty_keys, lefts, rights = [], [], []
+        for ty in self.known_rows.tolist():
+            _, row_lefts, row_rights = collision_map.row(ty)
+            ty_keys += [ty] * len(row_lefts)
+            lefts += row_lefts
+            rights += row_rights
+        self.run_row = np.array(ty_keys, dtype=np.int64)
+        self.run_left = np.array(lefts, dtype=np.int64)
+        self.run_right = np.array(rights, dtype=np.int64)
+        self.left_keys = run_key(self.run_row, self.run_left) # sorted: rows in order, and runs left to right in each row
+        self.right_keys = run_key(self.run_row, self.run_right)
+
+    def runs_at(self, i, ty):
+        # run indices from searchsorted, clipped into range, and which of them really are runs in tile row ty
+        count = len(self.run_row)
+        if not count:
+            return np.zeros(len(i), dtype=np.int64), np.zeros(len(i), dtype=bool)
+        j = np.clip(i, 0, count - 1)
+        return j, (i >= 0) & (i < count) & (self.run_row[j] == ty)
+
+    # CollisionMap.sweep_x/sweep_y for every row at once, with searchsorted in place of bisect.
+    # run edges are whole pixels, so "left >= x + w" is "left >= ceil(x + w)" and "right <= x" is "right <= floor(x)"
+    def sweep_x(self, x, y, w, h, dx, ts):
+        new_x = x + dx
+        hit = np.zeros(len(x), dtype=bool)
+        forward = dx > 0
+        moving = dx != 0
+        ty0 = np.floor(y / ts).astype(np.int64)
+        ty1 = np.ceil((y + h) / ts).astype(np.int64)
+        for k in range(int((ty1 - ty0).max())):
+            ty = ty0 + k
+            ahead = np.searchsorted(self.left_keys, run_key(ty, np.ceil(x + w).astype(np.int64))) # nearest run starting past the right side
+            behind = np.searchsorted(self.right_keys, run_key(ty, np.floor(x).astype(np.int64)), side="right") - 1 # ending before the left
+            i, found = self.runs_at(np.where(forward, ahead, behind), ty)
+            stop = np.where(forward, self.run_left[i] - w, self.run_right[i])
+            closer = found & moving & (ty < ty1) & np.where(forward, stop < new_x, stop > new_x)
+            new_x = np.where(closer, stop, new_x)
+            hit |= closer
+        return new_x, hit
+
+    def sweep_y(self, x, y, w, h, dy, ts):
+        new_y = y + dy
+        hit = np.zeros(len(x), dtype=bool)
+        forward = dy > 0
+        active = dy != 0
+        first = np.where(forward, np.ceil((y + h) / ts), np.floor(y / ts) - 1).astype(np.int64) # nearest tile row first
+        reach = np.where(forward, np.ceil((y + h + dy) / ts) - first, first + 1 - np.floor((y + dy) / ts)).astype(np.int64)
+        for k in range(int(reach.max())):
+            ty = np.where(forward, first + k, first - k)
+            i, found = self.runs_at(np.searchsorted(self.right_keys, run_key(ty, np.floor(x).astype(np.int64)), side="right"), ty) # first run ending past x
+            blocked = active & (k < reach) & found & (self.run_left[i] < x + w)
+            new_y = np.where(blocked, np.where(forward, ty * ts - h, (ty + 1) * ts), new_y)
+            hit |= blocked
+            active &= ~blocked
+        return new_y, hit
+
+    def step(self, tilemap):
+        rows = np.flatnonzero(self.alive[:self.count])
+        if not len(rows):
+            return
+        ts = tilemap.tile_size
+        movement = self.movement[rows]
+        frame_movement = movement + self.velocity[rows]
+        self.sync_runs(tilemap, ts, rows, frame_movement[:, 1])
+        collisions = np.zeros((len(rows), 4), dtype=bool)
+
+        pos = self.pos[rows]
+        keys = run_key(np.floor(pos[:, 1] / ts).astype(np.int64), np.floor(pos[:, 0]).astype(np.int64))
+        if self.order is None or not np.array_equal(rows, self.order_rows):
+            self.order, self.order_rows = np.argsort(keys, kind="stable"), rows
+        else:
+            self.order = self.order[np.argsort(keys[self.order], kind="stable")]
+        order = self.order
+        x, y = pos[order, 0], pos[order, 1]
+        w, h = self.size[rows[order], 0], self.size[rows[order], 1]
+        dx, dy = frame_movement[order, 0], frame_movement[order, 1]
+        x, hit = self.sweep_x(x, y, w, h, dx, ts) # x first, then y, like update
+        collisions[order, RIGHT] = hit & (dx > 0)
+        collisions[order, LEFT] = hit & (dx < 0)
+        y, hit = self.sweep_y(x, y, w, h, dy, ts)
+        collisions[order, DOWN] = hit & (dy > 0)
+        collisions[order, UP] = hit & (dy < 0)
+        self.pos[rows[order], 0], self.pos[rows[order], 1] = x, y
+        self.collisions[rows] = collisions
+
+        flip = self.flip[rows]
+        flip[movement[:, 0] > 0] = False # facing the way they're moving
+        flip[movement[:, 0] < 0] = True
+        self.flip[rows] = flip
+
+        vy = np.minimum(MAX_FALL, self.velocity[rows, 1] + GRAVITY)
+        vy[collisions[:, UP] | collisions[:, DOWN]] = 0
+        self.velocity[rows, 1] = vy
+
+class CollisionFlags:
+    # entity.collisions["down"] etc., read straight from the manager's array
+    __slots__ = ("manager", "index")
+
+    def __init__(self, manager, index):
+        self.manager = manager
+        self.index = index
+
+    def __getitem__(self, side):
+        return bool(self.manager.collisions[self.index, SIDES[side]])
+
+    def __setitem__(self, side, value):
+        self.manager.collisions[self.index, SIDES[side]] = value
@@ -1,53 +1,255 @@
 import json # new import; json module
+from array import array
 import pygame
 
-NEIGHBOR_OFFSETS = [(-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (0, 0), (-1, 1), (0, 1), (1, 1)] 
-PHYSICS_TILES = {"floor", "wall"} 
+NEIGHBOR_OFFSETS = [(-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (0, 0), (-1, 1), (0, 1), (1, 1)]
+PHYSICS_TILES = {"floor", "wall"}
+
+CHUNK_SHIFT = 4 # chunks are 16x16 tiles; x >> 4 is the same as x // 16, negatives included
+CHUNK_SIZE = 1 << CHUNK_SHIFT
+CHUNK_MASK = CHUNK_SIZE - 1
+NEIGHBOR_STEPS = [(dx, dy, (dy << CHUNK_SHIFT) + dx) for dx, dy in NEIGHBOR_OFFSETS] # offset plus how far it moves the flat index
+
+class Chunk:
+    # one 16x16 block of tiles stored as flat int arrays, indexed by (local_y << CHUNK_SHIFT) | local_x
+    # a type of 0 means the cell is empty, anything else is an index into Tilemap.type_names
+    __slots__ = ("types", "variants", "count")
+
+    def __init__(self):
+        self.types = array("H", bytes(2 * CHUNK_SIZE * CHUNK_SIZE))
+        self.variants = array("H", bytes(2 * CHUNK_SIZE * CHUNK_SIZE))
+        self.count = 0 # number of tiles in the chunk, so empty chunks can be dropped
 
 class Tilemap:
     def __init__(self, game, tile_size=16):
         self.game = game
         self.tile_size = tile_size
-        self.tilemap = {}
+        self.chunks = {} # (chunk_x, chunk_y) -> Chunk; no more building "x;y" strings for every lookup
+        self.type_names = [None] # type id -> asset group name; id 0 is reserved for empty cells
+        self.type_ids = {}
+        self.solid = [False] # type id -> whether it's one of the PHYSICS_TILES
         self.offgrid_tiles = []
+        self.offgrid_chunks = {} # the same off-grid tiles, bucketed by the chunk their position falls in
+        self.baked = {} # chunk key -> surface with the chunk's tiles already drawn on it
+        self.max_baked = 256 # 64 MB of baked chunks at 16px tiles before the oldest are dropped
+        self.overhang = None # how far a tile image can stick out past its cell, i.e. into the chunks right of/below it
+        self.collision = None # a CollisionMap attaches itself here (see scripts/collision.py)
+        self.sized_types = 1 # type_names from here on haven't had their images measured for overhang yet
+        self.version = 0 # goes up on every on-grid edit, so anything built from the tiles can tell it's out of date
+
+    def type_id(self, tile_type):
+        if tile_type not in self.type_ids: # first time we see this group, give it the next id
+            self.type_ids[tile_type] = len(self.type_names)
+            self.type_names.append(tile_type)
+            self.solid.append(tile_type in PHYSICS_TILES)
+        return self.type_ids[tile_type]
+
+    def get_tile(self, pos):
+        chunk = self.chunks.get((pos[0] >> CHUNK_SHIFT, pos[1] >> CHUNK_SHIFT))
+        if chunk is None:
+            return None
+        i = ((pos[1] & CHUNK_MASK) << CHUNK_SHIFT) | (pos[0] & CHUNK_MASK)
+        if not chunk.types[i]:
+            return None
+        return {"type": self.type_names[chunk.types[i]], "variant": chunk.variants[i], "pos": [pos[0], pos[1]]} # same shape as the old dict entries
+
+    def set_tile(self, pos, tile_type, variant):
+        key = (pos[0] >> CHUNK_SHIFT, pos[1] >> CHUNK_SHIFT)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = Chunk()
+        i = ((pos[1] & CHUNK_MASK) << CHUNK_SHIFT) | (pos[0] & CHUNK_MASK)
+        type_id = self.type_id(tile_type)
+        if chunk.types[i] == type_id and chunk.variants[i] == variant:
+            return # the editor paints the same tile every frame the mouse is held; nothing to re-bake
+        if not chunk.types[i]:
+            chunk.count += 1
+        chunk.types[i] = type_id
+        chunk.variants[i] = variant
+        self.version += 1
+        if self.collision is not None:
+            self.collision.forget(key)
+        self.unbake(pos[0] * self.tile_size, pos[1] * self.tile_size) # baked again the next time it's on screen
+
+    def remove_tile(self, pos): # returns whether there was anything to remove
+        key = (pos[0] >> CHUNK_SHIFT, pos[1] >> CHUNK_SHIFT)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            return False
+        i = ((pos[1] & CHUNK_MASK) << CHUNK_SHIFT) | (pos[0] & CHUNK_MASK)
+        if not chunk.types[i]:
+            return False
+        chunk.types[i] = 0
+        chunk.variants[i] = 0
+        chunk.count -= 1
+        if not chunk.count:
+            del self.chunks[key]
+        self.version += 1
+        if self.collision is not None:
+            self.collision.forget(key)
+        self.unbake(pos[0] * self.tile_size, pos[1] * self.tile_size)
+        return True
+
+    def offgrid_key(self, pos):
+        chunk_px = self.tile_size << CHUNK_SHIFT
+        return (int(pos[0] // chunk_px), int(pos[1] // chunk_px))
+
+    def add_offgrid(self, tile_type, variant, pos):
+        self.type_id(tile_type) # so render knows the group is in use and measures its images
+        tile = {"type": tile_type, "variant": variant, "pos": pos}
+        self.offgrid_tiles.append(tile)
+        key = self.offgrid_key(pos)
+        self.offgrid_chunks.setdefault(key, []).append(tile)
+        self.unbake(pos[0], pos[1])
+        return tile
 
-    def tiles_around(self, pos): 
-        tiles = [] 
-        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size)) 
-        for offset in NEIGHBOR_OFFSETS:
-            check_loc = str(tile_loc[0] + offset[0]) + ";" + str(tile_loc[1] + offset[1]) 
-            if check_loc in self.tilemap:
-                tiles.append(self.tilemap[check_loc])
+    def remove_offgrid(self, tile):
+        self.offgrid_tiles.remove(tile)
+        key = self.offgrid_key(tile["pos"])
+        bucket = self.offgrid_chunks[key]
+        bucket.remove(tile)
+        if not bucket:
+            del self.offgrid_chunks[key]
+        self.unbake(tile["pos"][0], tile["pos"][1])
+
+    def unbake(self, px, py):
+        # a tile image at pixel (px, py) can cover its own chunk and the ones right/below it, so all of those are stale
+        if not self.baked:
+            return
+        chunk_px = self.tile_size << CHUNK_SHIFT
+        reach = self.tile_size + self.overhang - 1
+        for cx in range(int(px // chunk_px), int((px + reach) // chunk_px) + 1):
+            for cy in range(int(py // chunk_px), int((py + reach) // chunk_px) + 1):
+                self.baked.pop((cx, cy), None)
+
+    def tiles(self): # every on-grid tile as (x, y, type, variant)
+        for (cx, cy), chunk in self.chunks.items():
+            for i, t in enumerate(chunk.types):
+                if t:
+                    yield ((cx << CHUNK_SHIFT) | (i & CHUNK_MASK), (cy << CHUNK_SHIFT) | (i >> CHUNK_SHIFT), self.type_names[t], chunk.variants[i])
+
+    def tile_count(self):
+        return sum(chunk.count for chunk in self.chunks.values())
+
+    def tiles_around(self, pos): # the tiles next to pos as (x, y, type id, variant); type_names[type id] is the group name
+        tiles = []
+        tx, ty = int(pos[0] // self.tile_size), int(pos[1] // self.tile_size)
+        lx, ly = tx & CHUNK_MASK, ty & CHUNK_MASK
+        if 0 < lx < CHUNK_MASK and 0 < ly < CHUNK_MASK: # all nine cells are in the same chunk, so look it up once
+            chunk = self.chunks.get((tx >> CHUNK_SHIFT, ty >> CHUNK_SHIFT))
+            if chunk is not None:
+                types, variants = chunk.types, chunk.variants
+                base = (ly << CHUNK_SHIFT) | lx
+                for dx, dy, step in NEIGHBOR_STEPS:
+                    t = types[base + step]
+                    if t:
+                        tiles.append((tx + dx, ty + dy, t, variants[base + step]))
+            return tiles
+        for dx, dy in NEIGHBOR_OFFSETS: # on a chunk edge; the neighbours can be in up to four chunks
+            x, y = tx + dx, ty + dy
+            chunk = self.chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+            if chunk is not None:
+                i = ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+                if chunk.types[i]:
+                    tiles.append((x, y, chunk.types[i], chunk.variants[i]))
 
         return tiles
 
     def save(self, path): # can't load anything unless we've saved something to load...
+        tilemap = {} # written out in the same "x;y" format as before, so old and new maps are interchangeable
+        for x, y, tile_type, variant in self.tiles():
+            tilemap[str(x) + ";" + str(y)] = {"type": tile_type, "variant": variant, "pos": [x, y]}
         with open(path, "w") as fh:
-            json.dump({"tilemap": self.tilemap, "tile_size": self.tile_size, "offgrid": self.offgrid_tiles}, fh, indent=4)
+            json.dump({"tilemap": tilemap, "tile_size": self.tile_size, "offgrid": self.offgrid_tiles}, fh, indent=4)
 
     def load(self, path):
         with open(path, "r") as fh:
             map_data = json.load(fh)
 
-        self.tilemap = map_data["tilemap"]
-        self.tile_size = map_data["tile_size"]
-        self.offgrid_tiles = map_data["offgrid"]
-        
-    def physics_rects_around(self, pos): 
+        self.tile_size = map_data["tile_size"] # set first, the off-grid buckets depend on it
+        self.chunks = {}
+        self.offgrid_tiles = []
+        self.offgrid_chunks = {}
+        self.baked = {}
+        self.version += 1
+        if self.collision is not None:
+            self.collision.clear()
+        for tile in map_data["tilemap"].values():
+            self.set_tile(tile["pos"], tile["type"], tile["variant"])
+        for tile in map_data["offgrid"]:
+            self.add_offgrid(tile["type"], tile["variant"], tile["pos"])
+
+    def physics_rects_around(self, pos):
         rects = []
-        for tile in self.tiles_around(pos): 
-            if tile["type"] in PHYSICS_TILES:
-                rects.append(pygame.Rect(tile["pos"][0] * self.tile_size, tile["pos"][1] * self.tile_size, self.tile_size, self.tile_size)) 
+        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        for offset in NEIGHBOR_OFFSETS: # straight to the type id; no tile dicts built along the way
+            x, y = tile_loc[0] + offset[0], tile_loc[1] + offset[1]
+            chunk = self.chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+            if chunk is not None and self.solid[chunk.types[((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)]]:
+                rects.append(pygame.Rect(x * self.tile_size, y * self.tile_size, self.tile_size, self.tile_size))
 
         return rects
-        
+
+    def bake(self, key):
+        # draws everything that lands inside one chunk onto a single surface, tiles from the chunks above/left included,
+        # so blitting the chunks side by side gives exactly the picture the per-tile render used to
+        assets = self.game.assets
+        chunk_px = self.tile_size << CHUNK_SHIFT
+        origin = (key[0] * chunk_px, key[1] * chunk_px)
+        reach = -(-self.overhang // chunk_px) # how many chunks back a tile image can reach from
+        surf = pygame.Surface((chunk_px, chunk_px)).convert()
+        surf.set_colorkey((0, 0, 0)) # black is transparent, same as the tile images
+        draws = [] # (tile image, position), all drawn with one blits() call at the end
+        for bx in range(key[0] - reach, key[0] + 1): # off-grid tiles were always drawn first, underneath the grid
+            for by in range(key[1] - reach, key[1] + 1):
+                for tile in self.offgrid_chunks.get((bx, by), ()):
+                    draws.append((assets[tile["type"]][tile["variant"]], (tile["pos"][0] - origin[0], tile["pos"][1] - origin[1])))
+        x0, y0 = key[0] << CHUNK_SHIFT, key[1] << CHUNK_SHIFT
+        back = -(-self.overhang // self.tile_size) # same idea in tiles
+        for x in range(x0 - back, x0 + CHUNK_SIZE): # x then y, like render
+            cx, lx = x >> CHUNK_SHIFT, x & CHUNK_MASK
+            for y in range(y0 - back, y0 + CHUNK_SIZE):
+                chunk = self.chunks.get((cx, y >> CHUNK_SHIFT))
+                if chunk is not None:
+                    i = ((y & CHUNK_MASK) << CHUNK_SHIFT) | lx
+                    if chunk.types[i]:
+                        draws.append((assets[self.type_names[chunk.types[i]]][chunk.variants[i]], (x * self.tile_size - origin[0], y * self.tile_size - origin[1])))
+        surf.blits(draws, doreturn=False)
+        return surf
+
     def render(self, surf, offset=(0, 0)):
-        for tile in self.offgrid_tiles:
-            surf.blit(self.game.assets[tile["type"]][tile["variant"]], (tile["pos"][0] - offset[0], tile["pos"][1] - offset[1]))
-        
-        for x in range(offset[0] // self.tile_size, (offset[0] + surf.get_width()) // self.tile_size + 1):
-            for y in range(offset[1] // self.tile_size, (offset[1] + surf.get_height()) // self.tile_size + 1):
-                loc = str(x) + ";" + str(y)
-                if loc in self.tilemap:
-                    tile = self.tilemap[loc]
-                    surf.blit(self.game.assets[tile["type"]][tile["variant"]], (tile["pos"][0] * self.tile_size - offset[0], tile["pos"][1] * self.tile_size - offset[1]))
\ No newline at end of file
+        if self.overhang is None:
+            self.overhang = 0
+        if len(self.type_names) > self.sized_types: # only groups the map uses get loaded, as they first show up
+            for name in self.type_names[self.sized_types:]:
+                for img in self.game.assets[name]:
+                    # the biggest tile image decides how far tiles can spill into the next chunk
+                    if max(img.get_size()) - self.tile_size > self.overhang:
+                        self.overhang = max(img.get_size()) - self.tile_size
+                        self.baked.clear() # baked with too short a reach
+            self.sized_types = len(self.type_names)
+
+        chunk_px = self.tile_size << CHUNK_SHIFT
+        reach = -(-self.overhang // chunk_px)
+        baked = self.baked
+        draws = []
+        for cx in range(offset[0] // chunk_px, (offset[0] + surf.get_width()) // chunk_px + 1):
+            for cy in range(offset[1] // chunk_px, (offset[1] + surf.get_height()) // chunk_px + 1):
+                key = (cx, cy)
+                if key in baked:
+                    chunk_surf = baked.pop(key) # popped and put back so the most recently drawn chunks stay at the end
+                else:
+                    chunk_surf = None # empty chunks are remembered as None so they aren't checked again every frame
+                    for bx in range(cx - reach, cx + 1):
+                        for by in range(cy - reach, cy + 1):
+                            if (bx, by) in self.chunks or (bx, by) in self.offgrid_chunks:
+                                chunk_surf = self.bake(key)
+                                break
+                        if chunk_surf is not None:
+                            break
+                    if len(baked) >= self.max_baked:
+                        del baked[next(iter(baked))] # drop the chunk that's been off screen the longest
+                baked[key] = chunk_surf
+                if chunk_surf is not None:
+                    draws.append((chunk_surf, (cx * chunk_px - offset[0], cy * chunk_px - offset[1])))
+        surf.blits(draws, doreturn=False)
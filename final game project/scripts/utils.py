@@ -14,4 +14,67 @@ def load_images(path):
     for img_name in sorted(os.listdir(BASE_IMG_PATH + path)):
         images.append(load_image(path + "/" + img_name))
     
-    return images
\ No newline at end of file
+    return images
+
+ACTIONS = [] # action id -> name, e.g. 0 -> "idle"
+ACTION_IDS = {} # and back again
+
+def action_id(name): # every action name gets a small int once, so entities never build "type/action" keys at runtime
+    if name not in ACTION_IDS:
+        ACTION_IDS[name] = len(ACTIONS)
+        ACTIONS.append(name)
+    return ACTION_IDS[name]
+
+class Animation:
+    # the frames of one animation, shared by every entity that plays it; nothing in here changes after loading
+    __slots__ = ("images", "flipped", "img_duration", "loop", "length")
+
+    def __init__(self, images, img_dur=5, loop=True):
+        self.images = tuple(images)
+        self.flipped = tuple(pygame.transform.flip(img, True, False) for img in images) # facing left, made once here instead of every frame in render
+        self.img_duration = img_dur # how many game frames each image stays up
+        self.loop = loop
+        self.length = img_dur * len(self.images) # in game frames
+
+    def copy(self): # what the entities used to keep; now just a playhead over the shared frames
+        return Playback(self)
+
+    def scaled(self, factor): # an up/down-scaled version to keep in the assets, made once at load time as well
+        size = lambda img: (round(img.get_width() * factor), round(img.get_height() * factor))
+        return Animation([pygame.transform.scale(img, size(img)) for img in self.images], self.img_duration, self.loop)
+
+class Playback:
+    # the only per-entity part of an animation: which one is playing, how far along it is, and whether it loops
+    __slots__ = ("anim", "frame", "loop", "done")
+
+    def __init__(self, anim):
+        self.play(anim)
+
+    def play(self, anim): # switch to another animation in place; no new objects
+        self.anim = anim
+        self.frame = 0
+        self.loop = anim.loop
+        self.done = False
+
+    def update(self):
+        if self.loop:
+            self.frame = (self.frame + 1) % self.anim.length # wraps back around to the first image
+        else:
+            self.frame = min(self.frame + 1, self.anim.length - 1) # stops on the last image
+            if self.frame >= self.anim.length - 1:
+                self.done = True
+
+    def img(self, flip=False):
+        return (self.anim.flipped if flip else self.anim.images)[self.frame // self.anim.img_duration]
+
+class AnimationLibrary:
+    # looks up each entity type's animations in the assets once: table(e_type)[action id] -> Animation (None if it has none)
+    def __init__(self, assets):
+        self.assets = assets
+        self.tables = {}
+
+    def table(self, e_type):
+        table = self.tables.get(e_type)
+        if table is None or len(table) < len(ACTIONS): # actions registered since the last lookup get added
+            table = self.tables[e_type] = tuple(self.assets.get(e_type + "/" + name) for name in ACTIONS)
+        return table